@@ -3,8 +3,9 @@ from .app import App, AppBase, global_app, enable_implicit, disable_implicit
 from .core import setup, excview_tween_factory as EXCVIEW
 from morepath import directive # register directive methods
 from .generic import remember, forget, settings
-from .view import render_json, render_html
+from .view import render_json, render_json_stream, render_html
 from .request import Request, Response
+from .responsecache import ResponseCache
 from .config import Config, Directive
 from .view import redirect
 from morepath.autosetup import autoconfig, autosetup
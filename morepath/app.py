@@ -6,6 +6,10 @@ from .settings import SettingSectionContainer
 from .converter import ConverterRegistry
 from .error import MountError
 from .tween import TweenRegistry
+from .dispatch import DispatchCache
+from .encoder import (get_json_encoder, json_encoder_from_settings,
+                      json_item_separator)
+from .view import compile_view_matchers
 from morepath import generic
 from reg import ClassRegistry, Lookup, CachingClassLookup, implicit
 import venusian
@@ -51,6 +55,7 @@ class AppBase(Configurable, ClassRegistry, ConverterRegistry,
         ConverterRegistry.__init__(self)
         TweenRegistry.__init__(self)
         self.name = name
+        self._memoize_links = False
         if variables is None:
             variables = set()
         self._variables = set(variables)
@@ -75,14 +80,45 @@ class AppBase(Configurable, ClassRegistry, ConverterRegistry,
         """
         ClassRegistry.clear(self)
         Configurable.clear(self)
+        ConverterRegistry.clear(self)
         TweenRegistry.clear(self)
         self.traject = Traject()
         self.settings = SettingSectionContainer()
         self._mounted = {}
+        self._cached_factories = {}
+        self.dispatch_cache = DispatchCache()
+        self.json_encode = get_json_encoder()
+        self.json_item_separator = json_item_separator(None)
 
     def actions(self):
         yield self.function(generic.settings), lambda: self.settings
 
+    def execute(self):
+        """Execute actions for app.
+
+        Once all actions are performed the app is prepared for
+        publishing according to its settings.
+        """
+        Configurable.execute(self)
+        self.dispatch_cache.clear()
+        compile_view_matchers(self)
+        self.traject.compile()
+        traject_settings = getattr(self.settings, 'traject', None)
+        self.traject.enable_cache(
+            getattr(traject_settings, 'cache_size', None))
+        self.traject.enable_stats(getattr(traject_settings, 'stats', False))
+        json_settings = getattr(self.settings, 'json', None)
+        self.json_encode = json_encoder_from_settings(json_settings)
+        self.json_item_separator = json_item_separator(json_settings)
+        link_settings = getattr(self.settings, 'link', None)
+        self._memoize_links = getattr(link_settings, 'memoize', False)
+        # the tweens may have changed, so compose them again
+        self.__dict__.pop('publish', None)
+        publish_settings = getattr(self.settings, 'publish', None)
+        if getattr(publish_settings, 'compiled', False):
+            from .compiled import compile_publish
+            self.publish = compile_publish(self)
+
     @reify
     def lookup(self):
         """Get the :class:`reg.Lookup` for this application.
@@ -106,6 +142,9 @@ class AppBase(Configurable, ClassRegistry, ConverterRegistry,
         """
         request = Request(environ)
         request.lookup = self.lookup
+        request.dispatch_cache = self.dispatch_cache
+        if self._memoize_links:
+            request.link_memo = {}
         return request
 
     def mounted(self, **context):
@@ -132,6 +171,45 @@ class AppBase(Configurable, ClassRegistry, ConverterRegistry,
     def mount_variables(self):
         return self._variables
 
+    def register_cached_factory(self, model, factory):
+        """Register model factory that caches its results.
+
+        :param model: the model class.
+        :param factory: a :class:`morepath.path.CachedFactory`.
+        """
+        self._cached_factories[model] = factory
+
+    def invalidate_model(self, model, **variables):
+        """Remove a model from the cache of its path.
+
+        Use this if you registered the path of the model with a
+        ``cache_size`` or ``negative_cache_size`` and the model
+        changed, was created or was deleted. If the path of the model
+        is not cached, this does nothing.
+
+        :param model: the model class.
+        :param variables: the arguments of the function that was
+          registered for the path, such as path variables. Missing
+          arguments get their default.
+        """
+        factory = self._cached_factories.get(model)
+        if factory is not None:
+            factory.invalidate(variables)
+
+    def clear_model_cache(self, model=None):
+        """Remove all models from the cache of their path.
+
+        :param model: the model class to clear the cache of. If
+          ``None``, the caches of all models are cleared.
+        """
+        if model is not None:
+            factories = [self._cached_factories.get(model)]
+        else:
+            factories = self._cached_factories.values()
+        for factory in factories:
+            if factory is not None:
+                factory.clear()
+
 
 class FailingWsgi(object):
     def __init__(self, app):
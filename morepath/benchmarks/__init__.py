@@ -0,0 +1,2 @@
+# this package contains benchmarks for Morepath; it is not scanned
+# for configuration.
@@ -0,0 +1,4 @@
+import sys
+from morepath.benchmarks.harness import main
+
+sys.exit(main())
@@ -0,0 +1,56 @@
+"""Micro-benchmark for the built-in date and datetime converters.
+
+Compares the current converters with the earlier ``strptime`` and
+``mktime`` based implementation. Run it like this::
+
+  $ python -m morepath.benchmarks.converters
+"""
+from datetime import date, datetime
+from time import mktime, strptime
+import timeit
+from morepath.core import (date_decode, date_encode,
+                           datetime_decode, datetime_encode)
+
+
+def strptime_date_decode(s):
+    return date.fromtimestamp(mktime(strptime(s, '%Y%m%d')))
+
+
+def strftime_date_encode(d):
+    return d.strftime('%Y%m%d')
+
+
+def strptime_datetime_decode(s):
+    return datetime.fromtimestamp(mktime(strptime(s, '%Y%m%dT%H%M%S')))
+
+
+def strftime_datetime_encode(d):
+    return d.strftime('%Y%m%dT%H%M%S')
+
+
+CASES = [
+    ('date decode', strptime_date_decode, date_decode, '20140408'),
+    ('date encode', strftime_date_encode, date_encode, date(2014, 4, 8)),
+    ('datetime decode', strptime_datetime_decode, datetime_decode,
+     '20140408T130500'),
+    ('datetime encode', strftime_datetime_encode, datetime_encode,
+     datetime(2014, 4, 8, 13, 5)),
+]
+
+
+def measure(func, value, number):
+    return min(timeit.repeat(lambda: func(value), number=number, repeat=3))
+
+
+def main(number=10000):
+    for name, old, new, value in CASES:
+        assert old(value) == new(value)
+        old_time = measure(old, value, number)
+        new_time = measure(new, value, number)
+        print "%-16s old: %.2f us new: %.2f us (%.1fx)" % (
+            name, old_time / number * 1e6, new_time / number * 1e6,
+            old_time / new_time)
+
+
+if __name__ == '__main__':
+    main()
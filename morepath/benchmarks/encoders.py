@@ -0,0 +1,54 @@
+"""Benchmark for the JSON encoder backends.
+
+Compares the installed backends of :mod:`morepath.encoder` on typical
+REST payloads: a single resource and a collection of resources. Run
+it like this::
+
+  $ python -m morepath.benchmarks.encoders
+
+Backends that are not installed, or that don't support the options,
+are skipped.
+"""
+import timeit
+from morepath.encoder import JSON_BACKENDS
+
+
+def resource(i):
+    return {
+        'id': i,
+        '@id': 'http://localhost/documents/%s' % i,
+        'title': u'Document %s' % i,
+        'published': i % 2 == 0,
+        'rating': i / 3.0,
+        'tags': ['a', 'b', 'c'],
+        'author': {'name': u'Auth\xf6r', 'email': 'author@example.com'},
+    }
+
+
+PAYLOADS = [
+    ('resource', resource(1)),
+    ('collection', [resource(i) for i in range(100)]),
+]
+
+OPTIONS = [
+    ('default', {}),
+    ('compact', {'separators': (',', ':')}),
+]
+
+
+def main(number=1000):
+    for payload_name, payload in PAYLOADS:
+        for options_name, options in OPTIONS:
+            for backend in sorted(JSON_BACKENDS):
+                encode = JSON_BACKENDS[backend](**options)
+                if encode is None:
+                    continue
+                seconds = min(timeit.repeat(lambda: encode(payload),
+                                            number=number, repeat=3))
+                print "%-10s %-8s %-10s %8.1f us" % (
+                    payload_name, options_name, backend,
+                    seconds / number * 1e6)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+"""Benchmark harness for the request pipeline.
+
+Drives the WSGI interface of apps with synthetic WSGI environments for
+a number of scenarios and reports the results as JSON, so that they
+can be compared between commits. Run it like this::
+
+  $ python -m morepath.benchmarks
+  $ python -m morepath.benchmarks --number 5000 flat links > result.json
+
+For each scenario it reports:
+
+``requests_per_second``
+  The amount of requests handled per second.
+
+``p50_ms`` and ``p99_ms``
+  The median and 99th percentile latency of a request in milliseconds.
+
+``allocations``
+  The amount of objects tracked by the garbage collector, such as
+  instances, lists and dictionaries, that are allocated per request.
+  The requests and responses are kept alive while counting, so that
+  objects that are freed once the request is done are counted too.
+  Strings and numbers are not tracked, so they are not counted.
+
+``peak_memory``
+  The peak amount of memory in bytes allocated during a request
+  above what was allocated before. Only available if the
+  ``tracemalloc`` module can be imported, otherwise ``null``.
+"""
+import argparse
+import base64
+import gc
+import json
+import platform
+import sys
+import timeit
+import morepath
+from morepath.security import BasicAuthIdentityPolicy
+from webob import Request
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+
+class Scenario(object):
+    """A benchmark scenario.
+
+    :param name: the name of the scenario.
+    :param description: a description of the scenario.
+    :param create: a function that creates a committed app. It
+      takes ``size`` as argument.
+    :param requests: a function that takes ``size`` and returns a list
+      of ``(path, headers)`` tuples to request in turn.
+    """
+    def __init__(self, name, description, create, requests):
+        self.name = name
+        self.description = description
+        self.create = create
+        self.requests = requests
+
+    def environs(self, size):
+        result = []
+        for path, headers in self.requests(size):
+            result.append(Request.blank(path, headers=headers).environ)
+        return result
+
+
+def create_flat(size):
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+
+    def register(i):
+        class Model(object):
+            def __init__(self, id):
+                self.id = id
+
+        @app.path(path='route%s/{id}' % i, model=Model)
+        def get_model(id):
+            return Model(id)
+
+        @app.view(model=Model)
+        def default(self, request):
+            return 'Model %s' % self.id
+
+    for i in range(size):
+        register(i)
+    config.commit()
+    return app
+
+
+def create_nested(size):
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+    parent = app
+    for i in range(size):
+        mounted = morepath.App(variables=['mount%s' % i],
+                               testing_config=config)
+
+        def get_context(id, i=i):
+            return {'mount%s' % i: id}
+        parent.mount(path='mount%s/{id}' % i, app=mounted)(get_context)
+        parent = mounted
+
+    @parent.path(path='models/{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @parent.view(model=Model)
+    def default(self, request):
+        return request.link(self)
+
+    config.commit()
+    return app
+
+
+def create_predicates(size):
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    def register(i):
+        name = 'p%s' % i
+
+        @app.predicate(name=name, order=i + 2, default='')
+        def predicate(self, request):
+            return request.GET.get(name, '')
+
+        @app.view(model=Root, **{name: 'yes'})
+        def view(self, request):
+            return name
+
+    for i in range(size):
+        register(i)
+
+    @app.view(model=Root)
+    def default(self, request):
+        return 'default'
+
+    config.commit()
+    return app
+
+
+def create_links(size):
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.path(path='documents/{id}')
+    class Document(object):
+        def __init__(self, id):
+            self.id = id
+
+    documents = [Document(unicode(i)) for i in range(size)]
+
+    @app.view(model=Root)
+    def default(self, request):
+        return '\n'.join([request.link(document) for document in documents])
+
+    config.commit()
+    return app
+
+
+def create_json(size):
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    data = [{'id': i, 'title': u'Document %s' % i, 'tags': ['a', 'b']}
+            for i in range(size)]
+
+    @app.json(model=Root)
+    def default(self, request):
+        return data
+
+    config.commit()
+    return app
+
+
+def create_permissions(size):
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+
+    class Permission(object):
+        pass
+
+    @app.path(path='documents/{id}')
+    class Document(object):
+        def __init__(self, id):
+            self.id = id
+
+    @app.permission(model=Document, permission=Permission)
+    def get_permission(identity, model, permission):
+        return identity.userid == 'user'
+
+    @app.view(model=Document, permission=Permission)
+    def default(self, request):
+        return 'Document %s' % self.id
+
+    @app.identity_policy()
+    def policy():
+        return BasicAuthIdentityPolicy()
+
+    config.commit()
+    return app
+
+
+AUTHORIZATION = {'Authorization': 'Basic ' + base64.b64encode('user:secret')}
+
+SCENARIOS = [
+    Scenario('flat', "a flat route table of size paths",
+             create_flat,
+             lambda size: [('/route0/1', {}),
+                           ('/route%s/1' % (size - 1), {})]),
+    Scenario('nested', "size nested mounts",
+             create_nested,
+             lambda size: [('/' + '/'.join(['mount%s/a' % i for
+                                            i in range(size)]) +
+                            '/models/1', {})]),
+    Scenario('predicates', "size custom view predicates",
+             create_predicates,
+             lambda size: [('/', {}), ('/?p%s=yes' % (size - 1), {})]),
+    Scenario('links', "a view that links to size objects",
+             create_links,
+             lambda size: [('/', {})]),
+    Scenario('json', "a JSON view that renders size objects",
+             create_json,
+             lambda size: [('/', {})]),
+    Scenario('permissions', "a view with a permission check",
+             create_permissions,
+             lambda size: [('/documents/1', AUTHORIZATION)]),
+]
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def percentile(sorted_values, fraction):
+    index = int(round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def measure_allocations(call, number):
+    """Count the gc-tracked objects allocated by call.
+
+    :param call: a function that returns a sequence of the objects
+      to keep alive, so that what they refer to is counted too.
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        kept = []
+        before = len(gc.get_objects())
+        for i in range(number):
+            kept.extend(call())
+        after = len(gc.get_objects())
+    finally:
+        gc.enable()
+    # the list of kept objects itself
+    return float(after - before - 1) / number
+
+
+def measure_peak_memory(call):
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak - start
+
+
+def run(scenario, size=10, number=1000):
+    """Run a benchmark scenario.
+
+    :param scenario: a :class:`Scenario`.
+    :param size: the size of the scenario, such as the amount of routes.
+    :param number: the amount of requests to measure.
+    :returns: a dictionary with the results.
+    """
+    app = scenario.create(size)
+    environs = scenario.environs(size)
+    calls = []
+    for environ in environs:
+        def call(environ=environ):
+            app(environ.copy(), start_response)
+        calls.append(call)
+    mount = app.mounted()
+
+    def publish(environ=environs[0]):
+        # like calling the app, but keeping the request and response
+        request = app.request(environ.copy())
+        request.mounts.append(mount)
+        response = app.publish(request)
+        return request, response, response(request.environ, start_response)
+
+    # warm up caches and check that the scenario works
+    for environ in environs:
+        statuses = []
+        app(environ.copy(),
+            lambda status, headers, exc_info=None: statuses.append(status))
+        if statuses != ['200 OK']:
+            raise RuntimeError("%s: %s gave %s" % (
+                scenario.name, environ['PATH_INFO'], statuses))
+    timer = timeit.default_timer
+    latencies = []
+    for i in range(number):
+        call = calls[i % len(calls)]
+        start = timer()
+        call()
+        latencies.append(timer() - start)
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        'description': scenario.description,
+        'size': size,
+        'number': number,
+        'requests_per_second': number / total,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'allocations': measure_allocations(publish, number),
+        'peak_memory': measure_peak_memory(calls[0]),
+    }
+
+
+def main(argv=None):
+    names = [scenario.name for scenario in SCENARIOS]
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Morepath request pipeline.")
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help="scenarios to run, all if omitted: %s" %
+                        ', '.join(names))
+    parser.add_argument('--number', type=int, default=1000,
+                        help="amount of requests per scenario")
+    parser.add_argument('--size', type=int, default=10,
+                        help="size of the scenarios")
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in names:
+            parser.error("unknown scenario: %s" % name)
+    selected = args.scenarios or names
+    results = {}
+    for scenario in SCENARIOS:
+        if scenario.name in selected:
+            results[scenario.name] = run(scenario, args.size, args.number)
+    json.dump({
+        'python': platform.python_version(),
+        'scenarios': results,
+    }, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write('\n')
+    return 0
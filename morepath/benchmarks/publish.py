@@ -0,0 +1,95 @@
+"""Benchmark for the per-request overhead of publishing.
+
+Compares the normal publisher with the compiled publisher enabled by
+the ``publish.compiled`` setting, for a hello world app and for an app
+with nested mounts. Run it like this::
+
+  $ python -m morepath.benchmarks.publish
+"""
+import timeit
+import morepath
+from webob import Request
+
+
+def hello_world_app(compiled):
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+
+    @app.setting('publish', 'compiled')
+    def get_compiled():
+        return compiled
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.view(model=Root)
+    def root_default(self, request):
+        return 'Hello world!'
+
+    config.commit()
+    return app
+
+
+def nested_mount_app(compiled):
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+    mounted = morepath.App(variables=['mount_id'], testing_config=config)
+    nested = morepath.App(variables=['nested_id'], testing_config=config)
+
+    @app.setting('publish', 'compiled')
+    def get_compiled():
+        return compiled
+
+    @nested.path(path='models/{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @nested.view(model=Model)
+    def model_default(self, request):
+        return 'Model %s' % self.id
+
+    @mounted.mount(path='nested/{id}', app=nested)
+    def get_nested_context(id):
+        return {'nested_id': id}
+
+    @app.mount(path='mounted/{id}', app=mounted)
+    def get_mounted_context(id):
+        return {'mount_id': id}
+
+    config.commit()
+    return app
+
+
+CASES = [
+    ('hello world', hello_world_app, '/'),
+    ('nested mounts', nested_mount_app, '/mounted/a/nested/b/models/1'),
+]
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def measure(app, path, number):
+    environ = Request.blank(path).environ
+
+    def request():
+        app(environ.copy(), start_response)
+    return min(timeit.repeat(request, number=number, repeat=3))
+
+
+def main(number=2000):
+    for name, create_app, path in CASES:
+        normal = create_app(False)
+        compiled = create_app(True)
+        normal_time = measure(normal, path, number)
+        compiled_time = measure(compiled, path, number)
+        print "%-14s normal: %.1f us compiled: %.1f us (%.2fx)" % (
+            name, normal_time / number * 1e6, compiled_time / number * 1e6,
+            normal_time / compiled_time)
+
+
+if __name__ == '__main__':
+    main()
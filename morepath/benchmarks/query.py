@@ -0,0 +1,106 @@
+"""Benchmark for decoding URL parameters.
+
+Compares decoding parameters from :attr:`morepath.Request.query_parameters`
+with the earlier implementation, which looked up each parameter in
+``request.GET``, for a query string with many parameters. Run it like
+this::
+
+  $ python -m morepath.benchmarks.query
+"""
+import timeit
+from morepath.converter import (ParameterFactory, Converter,
+                                IDENTITY_CONVERTER)
+from morepath.request import Request
+from webob import Request as WebObRequest
+from webob.exc import HTTPBadRequest
+
+
+class MultiDictParameterFactory(ParameterFactory):
+    """Parameter factory as it decoded ``request.GET`` before."""
+    def __call__(self, url_parameters):
+        result = {}
+        for name, default in self.parameters.items():
+            value = url_parameters.getall(name)
+            converter = self.converters.get(name, IDENTITY_CONVERTER)
+            if converter.is_missing(value):
+                if name in self.required:
+                    raise HTTPBadRequest(
+                        "Required URL parameter missing: %s" %
+                        name)
+                result[name] = default
+                continue
+            try:
+                result[name] = converter.decode(value)
+            except ValueError:
+                raise HTTPBadRequest(
+                    "Cannot decode URL parameter %s: %s" % (
+                        name, value))
+
+        if not self.extra:
+            return result
+
+        remaining = set(url_parameters.keys()).difference(
+            set(result.keys()))
+        extra = {}
+        for name in remaining:
+            value = url_parameters.getall(name)
+            converter = self.converters.get(name, IDENTITY_CONVERTER)
+            try:
+                extra[name] = converter.decode(value)
+            except ValueError:
+                raise HTTPBadRequest(
+                    "Cannot decode URL parameter %s: %s" % (
+                        name, value))
+        result['extra_parameters'] = extra
+        return result
+
+
+def factory_arguments(declared, extra):
+    parameters = {}
+    converters = {}
+    for i in range(declared):
+        name = 'p%s' % i
+        if i % 2:
+            parameters[name] = 0
+            converters[name] = Converter(int)
+        else:
+            parameters[name] = u''
+    return parameters, converters, [], extra
+
+
+def query_string(declared, extra):
+    parts = ['p%s=%s' % (i, i) for i in range(declared)]
+    parts.extend(['e%s=caf%%C3%%A9+%s' % (i, i) for i in range(extra)])
+    return '&'.join(parts)
+
+
+def old(environ, factory):
+    request = Request(environ.copy())
+    return factory(request.GET)
+
+
+def new(environ, factory):
+    request = Request(environ.copy())
+    return factory(request.query_parameters)
+
+
+def main(number=10000, declared=20, extra=5):
+    environ = WebObRequest.blank(
+        '/?' + query_string(declared, extra)).environ
+    for with_extra in [False, True]:
+        arguments = factory_arguments(declared, with_extra)
+        old_factory = MultiDictParameterFactory(*arguments)
+        new_factory = ParameterFactory(*arguments)
+        assert old(environ, old_factory) == new(environ, new_factory)
+        results = []
+        for func, factory in [(old, old_factory), (new, new_factory)]:
+            def call():
+                return func(environ, factory)
+            seconds = min(timeit.repeat(call, number=number, repeat=3))
+            results.append(seconds / number * 1e6)
+        print ("%d parameters, extra=%-5s old: %.1f us new: %.1f us" % (
+            declared + extra, with_extra, results[0], results[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark for the allocations made by creating and publishing requests.
+
+Compares :class:`morepath.Request` with the earlier implementation,
+which parsed the path and allocated its lists up front, for a hello
+world view. Run it like this::
+
+  $ python -m morepath.benchmarks.request
+
+The amount of objects is counted by keeping the requests alive, so it
+includes everything a request holds on to.
+"""
+import gc
+import timeit
+import morepath
+from morepath.request import Request
+from morepath.traject import parse_segments
+from webob import Request as WebObRequest
+
+
+class EagerRequest(Request):
+    """Request as it was initialized before."""
+    def __init__(self, environ):
+        super(EagerRequest, self).__init__(environ)
+        self._segments = parse_segments(self.path_info)
+        self._consumed = 0
+        self._unconsumed = None
+        self._after = []
+
+
+def hello_world_app():
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.view(model=Root)
+    def root_default(self, request):
+        return 'Hello world!'
+
+    config.commit()
+    return app
+
+
+def create(app, request_class, environ):
+    return request_class(environ.copy())
+
+
+def publish(app, request_class, environ):
+    request = request_class(environ.copy())
+    request.lookup = app.lookup
+    request.dispatch_cache = app.dispatch_cache
+    request.mounts.append(app.mounted())
+    app.publish(request)
+    return request
+
+
+def count_objects(func, number):
+    gc.collect()
+    gc.disable()
+    try:
+        before = len(gc.get_objects())
+        kept = [func() for i in range(number)]
+        after = len(gc.get_objects())
+    finally:
+        gc.enable()
+    # the list of kept requests itself
+    return float(after - before - 1) / len(kept)
+
+
+def main(number=1000):
+    app = hello_world_app()
+    environ = WebObRequest.blank('/').environ
+    for name, func in [('create', create), ('publish', publish)]:
+        results = []
+        for request_class in [EagerRequest, Request]:
+            def call():
+                return func(app, request_class, environ)
+            objects = count_objects(call, number)
+            seconds = min(timeit.repeat(call, number=number, repeat=3))
+            results.append((objects, seconds / number * 1e6))
+        (old_objects, old_time), (new_objects, new_time) = results
+        print ("%-8s old: %.1f objects %.1f us "
+               "new: %.1f objects %.1f us" % (
+                   name, old_objects, old_time, new_objects, new_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class LRUCache(object):
+    """A bounded cache that evicts the least recently used entries.
+
+    Keeps track of hits, misses and evictions so that the
+    effectiveness of the cache can be inspected.
+
+    Entries can optionally expire after a time to live.
+
+    The cache can be shared between threads.
+    """
+    def __init__(self, size, ttl=None, clock=time.time):
+        """
+        :param size: the maximum amount of entries in the cache.
+        :param ttl: the amount of seconds after which an entry expires.
+          If ``None``, entries don't expire.
+        :param clock: function that returns the current time in seconds.
+        """
+        self.size = size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Get value for key, or default if it is not in the cache.
+        """
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            if self.ttl is not None:
+                expires, value = value
+                if expires <= self.clock():
+                    self.expirations += 1
+                    self.misses += 1
+                    return default
+                # re-insert so that it becomes the most recently used
+                self._entries[key] = expires, value
+            else:
+                self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value for key, evicting the oldest entry if full.
+        """
+        with self._lock:
+            entries = self._entries
+            entries.pop(key, None)
+            if self.ttl is not None:
+                entries[key] = self.clock() + self.ttl, value
+            else:
+                entries[key] = value
+            if len(entries) > self.size:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Remove key from the cache if it is there.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def keys(self):
+        """Get a list of the keys in the cache, oldest first.
+        """
+        with self._lock:
+            return list(self._entries.keys())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self):
+        """Get cache statistics.
+
+        :returns: a dictionary with ``size``, ``entries``, ``hits``,
+          ``misses`` and ``evictions`` keys. If entries expire there
+          is also an ``expirations`` key.
+        """
+        result = {
+            'size': self.size,
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+        if self.ttl is not None:
+            result['expirations'] = self.expirations
+        return result
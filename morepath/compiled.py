@@ -0,0 +1,104 @@
+"""A publisher specialized for an app.
+
+Enabled with the ``publish.compiled`` setting. It gives the same
+result as the normal publisher composed from the tweens around
+:func:`morepath.publish.publish`, but takes shortcuts where the app
+uses the defaults of the Morepath framework:
+
+* If the only tween is the exception view tween, it is inlined
+  instead of composed.
+
+* If the app has only the default ``name`` and ``request_method``
+  predicates, they are calculated directly instead of by the
+  predicate matcher.
+
+* If no ``response`` function is registered for a model class
+  besides the default one, it is called directly instead of through
+  generic dispatch.
+"""
+from morepath import generic
+from .core import (get_response, view_response, excview_tween_factory,
+                   name_predicate, request_method_predicate)
+from .publish import resolve_model, get_segments_view_name
+from .view import has_view_name
+from webob.exc import HTTPNotFound
+
+DEFAULT_PREDICATES = {
+    'name': name_predicate,
+    'request_method': request_method_predicate,
+}
+
+
+def has_default_predicates(app):
+    """Check whether app has only the default view predicates.
+    """
+    predicate_info = app.exact('predicate_info', ()) or {}
+    funcs = {name: getattr(predicate, 'func', None) for
+             name, (order, predicate) in predicate_info.items()}
+    return funcs == DEFAULT_PREDICATES
+
+
+def compile_publish(app):
+    """Create publish function specialized for app.
+
+    :param app: the :class:`morepath.App` to publish. Its
+      configuration should be committed.
+    :returns: a function that takes a request and returns a response.
+    """
+    # mounted apps have their own predicates; we check them as we
+    # encounter them during publishing
+    default_predicates = {}
+
+    def resolve_response(request, model):
+        segments, pos = request.get_segments()
+        request.view_name = get_segments_view_name(segments, pos)
+        lookup = request.lookup
+        response_func = request.dispatch_cache.component(
+            generic.response, lookup, (request.__class__, model.__class__))
+        if response_func is not get_response:
+            response = generic.response(request, model, default=None,
+                                        lookup=lookup)
+        else:
+            response = None
+            mounted_app = request.mounts[-1].app
+            inline = default_predicates.get(mounted_app)
+            if inline is None:
+                inline = default_predicates[mounted_app] = (
+                    has_default_predicates(mounted_app))
+            if inline and lookup is mounted_app.lookup:
+                if not has_view_name(lookup, model, request.view_name):
+                    raise HTTPNotFound()
+                view = lookup.component(
+                    generic.view, (request, model), None,
+                    {'name': request.view_name,
+                     'request_method': request.method})
+                if view is not None:
+                    response = view_response(request, model, view)
+            else:
+                response = get_response(request, model)
+        if response is None:
+            raise HTTPNotFound()
+        return response
+
+    def publish(request):
+        model = resolve_model(request)
+        return resolve_response(request, model)
+
+    tween_factories = app.sorted_tween_factories()
+    if tween_factories != [excview_tween_factory]:
+        result = publish
+        for tween_factory in reversed(tween_factories):
+            result = tween_factory(app, result)
+        return result
+
+    def publish_with_excview(request):
+        try:
+            return publish(request)
+        except Exception as exc:
+            response = generic.response(request, exc, lookup=app.lookup,
+                                        default=None, predicates={})
+            if response is None:
+                raise
+            return response
+
+    return publish_with_excview
@@ -2,6 +2,12 @@ from reg.mapping import Map, ClassMapKey
 from types import ClassType
 from morepath.error import DirectiveError
 from webob.exc import HTTPBadRequest
+from .cache import LRUCache
+from urllib import unquote
+import re
+
+
+QUERY_SEPARATOR = re.compile('[&;]')
 
 
 class Converter(object):
@@ -35,6 +41,8 @@ class Converter(object):
         return value == []
 
     def __eq__(self, other):
+        if isinstance(other, CachingConverter):
+            return other == self
         if not isinstance(other, Converter):
             return False
         return (self.single_decode is other.single_decode and
@@ -44,6 +52,61 @@ class Converter(object):
         return not self == other
 
 
+CACHE_MISS = object()
+
+
+class CachingConverter(Converter):
+    """A converter that caches the results of another converter.
+
+    Values that fail to decode are not cached. Values that cannot be
+    hashed are encoded without using the cache.
+    """
+    def __init__(self, converter, cache_size):
+        """Create new caching converter.
+
+        :param converter: the :class:`Converter` to cache.
+        :param cache_size: the maximum amount of entries in the decode
+          and encode caches, each.
+        """
+        super(CachingConverter, self).__init__(self.cached_decode,
+                                               self.cached_encode)
+        self.converter = converter
+        self.decode_cache = LRUCache(cache_size)
+        self.encode_cache = LRUCache(cache_size)
+
+    def cached_decode(self, s):
+        # include type so that str and unicode are cached separately
+        key = type(s), s
+        result = self.decode_cache.get(key, CACHE_MISS)
+        if result is CACHE_MISS:
+            result = self.converter.single_decode(s)
+            self.decode_cache.put(key, result)
+        return result
+
+    def cached_encode(self, value):
+        # include type so that 1, 1.0 and True are cached separately
+        key = type(value), value
+        try:
+            result = self.encode_cache.get(key, CACHE_MISS)
+        except TypeError:
+            return self.converter.single_encode(value)
+        if result is CACHE_MISS:
+            result = self.converter.single_encode(value)
+            self.encode_cache.put(key, result)
+        return result
+
+    def stats(self):
+        return {
+            'decode': self.decode_cache.stats(),
+            'encode': self.encode_cache.stats(),
+        }
+
+    def __eq__(self, other):
+        if isinstance(other, CachingConverter):
+            other = other.converter
+        return self.converter == other
+
+
 class ListConverter(object):
     """How to decode from list of strings to list of objects and back.
 
@@ -89,17 +152,45 @@ class ConverterRegistry(object):
     Is aware of inheritance.
     """
     def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Clear all registered converters.
+        """
         self._map = Map()
+        self._caching_converters = {}
 
-    def register_converter(self, type, converter):
+    def register_converter(self, type, converter, cache_size=None):
         """Register a converter for type.
 
         :param type: the Python type for which to register
           the converter.
         :param converter: a :class:`morepath.Converter` instance.
+        :param cache_size: if given, cache up to this amount of
+          decoded and encoded values for this converter. Optional.
         """
+        if cache_size:
+            if not isinstance(converter, Converter):
+                raise DirectiveError(
+                    "Cannot cache converter for type %r: %r" %
+                    (type, converter))
+            converter = CachingConverter(converter, cache_size)
+            self._caching_converters[type] = converter
+        else:
+            self._caching_converters.pop(type, None)
         self._map[ClassMapKey(type)] = converter
 
+    def converter_cache_stats(self):
+        """Get statistics for the caches of converters.
+
+        :returns: a dictionary with as keys the types for which
+          a converter was registered with a ``cache_size``. The values
+          are dictionaries with ``decode`` and ``encode`` keys, each
+          with the statistics of that cache.
+        """
+        return {type: converter.stats() for
+                type, converter in self._caching_converters.items()}
+
     def converter_for_type(self, type):
         """Get converter for type.
 
@@ -175,6 +266,43 @@ class ConverterRegistry(object):
         return result
 
 
+def unquote_query(s):
+    """Unquote a name or value in a query string."""
+    if '+' in s:
+        s = s.replace('+', ' ')
+    if '%' in s:
+        s = unquote(s)
+    return s
+
+
+def parse_query(query_string, encoding='utf-8'):
+    """Parse a query string into a dictionary of lists of values.
+
+    The query string is walked only once. Parameters without a value
+    get an empty string as value, like with ``request.GET``.
+
+    :param query_string: the query string, without the leading ``?``.
+    :param encoding: the encoding of names and values.
+    :returns: a dictionary of parameter names to lists of values, in
+      the order they appear in the query string.
+    """
+    result = {}
+    if not query_string:
+        return result
+    for part in QUERY_SEPARATOR.split(query_string):
+        if not part:
+            continue
+        name, sep, value = part.partition('=')
+        name = unquote_query(name).decode(encoding)
+        value = unquote_query(value).decode(encoding)
+        values = result.get(name)
+        if values is None:
+            result[name] = [value]
+        else:
+            values.append(value)
+    return result
+
+
 class ParameterFactory(object):
     """Convert URL parameters.
 
@@ -195,11 +323,20 @@ class ParameterFactory(object):
 
     def __call__(self, url_parameters):
         """Convert URL parameters to Python dictionary with values.
+
+        :param url_parameters: dictionary of parameter names -> lists
+          of values as returned by :func:`parse_query`, or a
+          ``webob.multidict.MultiDict`` such as ``request.GET``.
         """
+        if not isinstance(url_parameters, dict):
+            url_parameters = url_parameters.dict_of_lists()
+        converters = self.converters
         result = {}
         for name, default in self.parameters.items():
-            value = url_parameters.getall(name)
-            converter = self.converters.get(name, IDENTITY_CONVERTER)
+            value = url_parameters.get(name)
+            if value is None:
+                value = []
+            converter = converters.get(name, IDENTITY_CONVERTER)
             if converter.is_missing(value):
                 if name in self.required:
                     raise HTTPBadRequest(
@@ -217,12 +354,12 @@ class ParameterFactory(object):
         if not self.extra:
             return result
 
-        remaining = set(url_parameters.keys()).difference(
-            set(result.keys()))
+        parameters = self.parameters
         extra = {}
-        for name in remaining:
-            value = url_parameters.getall(name)
-            converter = self.converters.get(name, IDENTITY_CONVERTER)
+        for name, value in url_parameters.items():
+            if name in parameters:
+                continue
+            converter = converters.get(name, IDENTITY_CONVERTER)
             try:
                 extra[name] = converter.decode(value)
             except ValueError:
@@ -1,17 +1,21 @@
 from .app import global_app
 from .config import Config
-from .mount import Mount
+from .mount import Mount, add_mount_prefix
 import morepath.directive
 from morepath import generic
 from .app import AppBase
 from .request import Request, Response, LinkMaker, NothingMountedLinkMaker
 from .converter import Converter, IDENTITY_CONVERTER
+from .view import (has_view_name, get_validators, is_not_modified,
+                   set_validators)
+from .path import FactoryCaller
 from webob import Response as BaseResponse
-from webob.exc import HTTPException, HTTPUnauthorized, HTTPMethodNotAllowed
+from webob.exc import (HTTPException, HTTPUnauthorized, HTTPMethodNotAllowed,
+                       HTTPNotModified)
 import morepath
 from reg import mapply, KeyIndex
-from datetime import datetime, date
-from time import mktime, strptime
+from datetime import datetime, date, time
+import re
 
 
 assert morepath.directive  # we need to make the function directive work
@@ -29,46 +33,83 @@ def setup():
     :returns: :class:`Config` object.
     """
     config = Config()
-    config.scan(morepath, ignore=['.tests'])
+    config.scan(morepath, ignore=['.tests', '.benchmarks'])
     return config
 
 
+@global_app.setting_section(section='traject')
+def traject_settings():
+    return {
+        # maximum amount of resolved paths to cache; disabled if 0
+        'cache_size': 0,
+        # count how paths are matched; see Traject.enable_stats
+        'stats': False
+    }
+
+
+@global_app.setting_section(section='link')
+def link_settings():
+    return {
+        # memoize request.link results for the duration of a request
+        'memoize': False
+    }
+
+
+@global_app.setting_section(section='publish')
+def publish_settings():
+    return {
+        # use a publisher specialized for the app; see morepath.compiled
+        'compiled': False
+    }
+
+
+@global_app.setting_section(section='json')
+def json_settings():
+    return {
+        # encoder for JSON views; 'auto' uses the fastest one installed
+        'backend': 'auto',
+        # options as for json.dumps
+        'separators': None,
+        'ensure_ascii': True,
+        'sort_keys': False,
+        'default': None
+    }
+
+
 @global_app.function(generic.consume, Request, object)
 def traject_consume(request, model, lookup):
-    traject = generic.traject(model, lookup=lookup, default=None)
+    call = request.dispatch_cache.call
+    traject = call(generic.traject, lookup, model, default=None)
     if traject is None:
         return None
-    value, stack, traject_variables = traject.consume(request.unconsumed)
+    segments, pos = request.get_segments()
+    value, pos, traject_variables = traject.consume_segments(segments, pos)
     if value is None:
         return None
     get_model, get_parameters = value
-    variables = get_parameters(request.GET)
-    context = generic.context(model, default=None, lookup=lookup)
+    variables = get_parameters(request.query_parameters)
+    context = call(generic.context, lookup, model, default=None)
     if context is None:
         return None
     variables.update(context)
     variables['parent'] = model
     variables['request'] = request
     variables.update(traject_variables)
-    next_model = mapply(get_model, **variables)
+    if isinstance(get_model, FactoryCaller):
+        next_model = get_model(variables)
+    else:
+        next_model = mapply(get_model, **variables)
     if next_model is None:
         return None
-    request.unconsumed = stack
+    request.set_consumed(pos)
     return next_model
 
 
 @global_app.function(generic.link, Request, object, object)
 def link(request, model, mounted):
-    result = []
-    parameters = {}
-    while mounted is not None:
-        path, params = generic.path(model, lookup=mounted.lookup)
-        result.append(path)
-        parameters.update(params)
-        model = mounted
-        mounted = mounted.parent
-    result.reverse()
-    return '/'.join(result).strip('/'), parameters
+    path, parameters = generic.path(model, lookup=mounted.lookup)
+    prefix, prefix_parameters = mounted.prefix
+    return add_mount_prefix(path, parameters, prefix, prefix_parameters)
 
 
 @global_app.function(generic.linkmaker, Request, object)
@@ -103,27 +144,65 @@ def mount_context(mount):
 
 @global_app.function(generic.response, Request, object)
 def get_response(request, model, predicates=None):
+    if predicates is None and not has_view_name(request.lookup, model,
+                                                request.view_name):
+        # no need to match predicates, we cannot find the view anyway
+        return None
     view = generic.view.component(
         request, model, lookup=request.lookup,
         predicates=predicates,
         default=None)
     if view is None:
         return None
+    return view_response(request, model, view)
+
+
+def view_response(request, model, view):
+    """Get a Response from a view found for the model.
+    """
     if (view.permission is not None and
         not generic.permits(request.identity, model, view.permission,
                             lookup=request.lookup)):
         # XXX needs to become forbidden?
         raise HTTPUnauthorized()
+    if view.conditional:
+        etag, last_modified = get_validators(request, model, view)
+        if is_not_modified(request, etag, last_modified):
+            # the view isn't called at all
+            response = HTTPNotModified()
+            set_validators(response, etag, last_modified)
+            request.run_after(response)
+            return response
+    cache = view.cache
+    if cache is not None:
+        cache_key = cache.key(request, model)
+        if cache_key is not None:
+            response = cache.get(cache_key)
+            if response is not None:
+                request.run_after(response)
+                return response
+    after_count = len(request._after)
     content = view(request, model)
     if isinstance(content, BaseResponse):
         # the view took full control over the response
-        return content
+        response = content
+        if view.conditional:
+            set_validators(response, etag, last_modified)
+        return response
     # XXX consider always setting a default render so that view.render
     # can never be None
     if view.render is not None:
         response = view.render(content)
     else:
         response = Response(content, content_type='text/plain')
+    if view.conditional:
+        set_validators(response, etag, last_modified)
+    # the response is stored before the after functions run, as these
+    # belong to this request. A view that registers after functions
+    # itself isn't cached, as it isn't called for a cached response.
+    if (cache is not None and cache_key is not None and
+            len(request._after) == after_count):
+        cache.put(cache_key, response)
     request.run_after(response)
     return response
 
@@ -166,12 +245,23 @@ def unicode_converter():
     return IDENTITY_CONVERTER
 
 
+DATE_RE = re.compile(r'\d{8}\Z')
+DATETIME_RE = re.compile(r'\d{8}T\d{6}\Z')
+TIME_RE = re.compile(r'\d{6}\Z')
+ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}\Z')
+ISO_DATETIME_RE = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\Z')
+ISO_TIME_RE = re.compile(r'\d{2}:\d{2}:\d{2}\Z')
+
+
 def date_decode(s):
-    return date.fromtimestamp(mktime(strptime(s, '%Y%m%d')))
+    if DATE_RE.match(s) is None:
+        # strptime also accepts fields that are not zero-padded
+        return datetime.strptime(s, '%Y%m%d').date()
+    return date(int(s[0:4]), int(s[4:6]), int(s[6:8]))
 
 
 def date_encode(d):
-    return d.strftime('%Y%m%d')
+    return u'%04d%02d%02d' % (d.year, d.month, d.day)
 
 
 @global_app.converter(type=date)
@@ -180,11 +270,16 @@ def date_converter():
 
 
 def datetime_decode(s):
-    return datetime.fromtimestamp(mktime(strptime(s, '%Y%m%dT%H%M%S')))
+    if DATETIME_RE.match(s) is None:
+        # strptime also accepts fields that are not zero-padded
+        return datetime.strptime(s, '%Y%m%dT%H%M%S')
+    return datetime(int(s[0:4]), int(s[4:6]), int(s[6:8]),
+                    int(s[9:11]), int(s[11:13]), int(s[13:15]))
 
 
 def datetime_encode(d):
-    return d.strftime('%Y%m%dT%H%M%S')
+    return u'%04d%02d%02dT%02d%02d%02d' % (
+        d.year, d.month, d.day, d.hour, d.minute, d.second)
 
 
 @global_app.converter(type=datetime)
@@ -192,6 +287,73 @@ def datetime_converter():
     return Converter(datetime_decode, datetime_encode)
 
 
+def time_decode(s):
+    if TIME_RE.match(s) is None:
+        raise ValueError("Invalid time: %r" % s)
+    return time(int(s[0:2]), int(s[2:4]), int(s[4:6]))
+
+
+def time_encode(t):
+    return u'%02d%02d%02d' % (t.hour, t.minute, t.second)
+
+
+@global_app.converter(type=time)
+def time_converter():
+    return Converter(time_decode, time_encode)
+
+
+def iso_date_decode(s):
+    if ISO_DATE_RE.match(s) is None:
+        raise ValueError("Invalid ISO 8601 date: %r" % s)
+    return date(int(s[0:4]), int(s[5:7]), int(s[8:10]))
+
+
+def iso_date_encode(d):
+    return u'%04d-%02d-%02d' % (d.year, d.month, d.day)
+
+
+def iso_datetime_decode(s):
+    if ISO_DATETIME_RE.match(s) is None:
+        raise ValueError("Invalid ISO 8601 datetime: %r" % s)
+    return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                    int(s[11:13]), int(s[14:16]), int(s[17:19]))
+
+
+def iso_datetime_encode(d):
+    return u'%04d-%02d-%02dT%02d:%02d:%02d' % (
+        d.year, d.month, d.day, d.hour, d.minute, d.second)
+
+
+def iso_time_decode(s):
+    if ISO_TIME_RE.match(s) is None:
+        raise ValueError("Invalid ISO 8601 time: %r" % s)
+    return time(int(s[0:2]), int(s[3:5]), int(s[6:8]))
+
+
+def iso_time_encode(t):
+    return u'%02d:%02d:%02d' % (t.hour, t.minute, t.second)
+
+
+ISO_DATE_CONVERTER = Converter(iso_date_decode, iso_date_encode)
+"""Converter for dates in ISO 8601 format, i.e. ``2014-04-08``.
+
+Not used by default; return it from a :meth:`AppBase.converter`
+directive for ``date`` to use it.
+"""
+
+ISO_DATETIME_CONVERTER = Converter(iso_datetime_decode, iso_datetime_encode)
+"""Converter for datetimes in ISO 8601 format, i.e. ``2014-04-08T13:05:00``.
+
+Not used by default.
+"""
+
+ISO_TIME_CONVERTER = Converter(iso_time_decode, iso_time_encode)
+"""Converter for times in ISO 8601 format, i.e. ``13:05:00``.
+
+Not used by default.
+"""
+
+
 @global_app.tween_factory()
 def excview_tween_factory(app, handler):
     def excview_tween(request):
@@ -2,8 +2,9 @@ from .app import AppBase
 from .config import Directive
 from .settings import SettingSection
 from .error import ConfigError
-from .view import (register_view, render_json, render_html,
-                   register_predicate, register_predicate_fallback,
+from .view import (register_view, render_json, render_json_stream,
+                   render_html, register_predicate,
+                   register_predicate_fallback,
                    get_predicates_with_defaults)
 from .security import (register_permission_checker,
                        Identity, NoIdentity)
@@ -116,7 +117,7 @@ class SettingSectionDirective(Directive):
 class ConverterDirective(Directive):
     depends = [SettingDirective]
 
-    def __init__(self, app, type):
+    def __init__(self, app, type, cache_size=None):
         """Register custom converter for type.
 
         :param type: the Python type for which to register the
@@ -128,15 +129,22 @@ class ConverterDirective(Directive):
           :meth:`morepath.AppBase.path` directive, or is deduced from
           the value of the default argument of the decorated model
           function or class using ``type()``.
+        :param cache_size: if given, the converter caches up to this
+          amount of decoded and encoded values. Use this for converters
+          that are expensive and see the same values repeatedly.
+          Statistics are available through
+          :meth:`morepath.converter.ConverterRegistry.converter_cache_stats`.
+          Optional.
         """
         super(ConverterDirective, self).__init__(app)
         self.type = type
+        self.cache_size = cache_size
 
     def identifier(self, app):
         return ('converter', self.type)
 
     def perform(self, app, obj):
-        app.register_converter(self.type, obj())
+        app.register_converter(self.type, obj(), self.cache_size)
 
 
 @directive('path')
@@ -145,7 +153,8 @@ class PathDirective(Directive):
 
     def __init__(self, app, path, model=None,
                  variables=None, converters=None, required=None,
-                 get_converters=None):
+                 get_converters=None, cache_size=None, cache_ttl=None,
+                 negative_cache_size=None, negative_cache_ttl=None):
         """Register a model for a path.
 
         Decorate a function or a class (constructor). The function
@@ -178,6 +187,27 @@ class PathDirective(Directive):
           This function is called once during configuration time. It can
           be used to programmatically supply converters. It is merged
           with the ``converters`` dictionary, if supplied. Optional.
+        :param cache_size: the maximum amount of models returned by the
+          decorated function to cache. The arguments of the function
+          are the key, so it cannot take ``request`` or ``parent``.
+          Use it for expensive functions that return
+          models that rarely change. See
+          :meth:`morepath.AppBase.invalidate_model`. Optional; if
+          omitted models are not cached.
+        :param cache_ttl: the amount of seconds a model is cached.
+          Optional; if omitted the model is cached until it is evicted
+          or invalidated.
+        :param negative_cache_size: the maximum amount of paths to
+          remember for which the decorated function returned ``None``.
+          For these paths the function is not called again and a
+          ``404 Not Found`` is given immediately. Use it for expensive
+          functions, like database queries. As with ``cache_size``,
+          the function cannot take ``request`` or ``parent``.
+          Optional; if omitted nothing is remembered.
+        :param negative_cache_ttl: the amount of seconds a path for
+          which the decorated function returned ``None`` is
+          remembered. Optional; if omitted it is remembered until it
+          is evicted from the cache.
         """
         super(PathDirective, self).__init__(app)
         self.model = model
@@ -186,6 +216,10 @@ class PathDirective(Directive):
         self.converters = converters
         self.required = required
         self.get_converters = get_converters
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.negative_cache_size = negative_cache_size
+        self.negative_cache_ttl = negative_cache_ttl
 
     def identifier(self, app):
         return ('path', Path(self.path).discriminator())
@@ -210,7 +244,11 @@ class PathDirective(Directive):
         register_path(app, self.model, self.path,
                       self.variables, self.converters, self.required,
                       self.get_converters,
-                      obj)
+                      obj,
+                      cache_size=self.cache_size,
+                      cache_ttl=self.cache_ttl,
+                      negative_cache_size=self.negative_cache_size,
+                      negative_cache_ttl=self.negative_cache_ttl)
 
 
 @directive('permission')
@@ -320,7 +358,7 @@ class ViewDirective(Directive):
                PredicateFallbackDirective]
 
     def __init__(self, app, model, render=None, permission=None,
-                 **predicates):
+                 etag=None, last_modified=None, cache=None, **predicates):
         '''Register a view for a model.
 
         The decorated function gets ``self`` (model instance) and
@@ -346,6 +384,21 @@ class ViewDirective(Directive):
         :param permission: a permission class. The model should have this
           permission, otherwise access to this view is forbidden. If omitted,
           the view function is public.
+        :param etag: an optional function that gets ``self`` (model
+          instance) and ``request`` and returns an ETag string for the
+          response, or ``None``. It should be cheap to call. If the
+          ``If-None-Match`` header of a GET or HEAD request matches it,
+          a ``304 Not Modified`` response is returned without calling
+          the view function. Otherwise the ETag is set on the response.
+        :param last_modified: an optional function that gets ``self``
+          and ``request`` and returns the modification date of the
+          model as a ``datetime``, or ``None``. Like ``etag``, but
+          compared with the ``If-Modified-Since`` header, and set as
+          ``Last-Modified`` on the response.
+        :param cache: an optional :class:`morepath.ResponseCache`. The
+          rendered response is stored in it and reused for later
+          requests for the same model, without calling the view
+          function. Only use this for views without side effects.
         :param name: the name of the view as it appears in the URL. If omitted,
           it is the empty string, meaning the default view for the model.
           This is a predicate.
@@ -363,6 +416,9 @@ class ViewDirective(Directive):
         self.model = model
         self.render = render
         self.permission = permission
+        self.etag = etag
+        self.last_modified = last_modified
+        self.cache = cache
         self.predicates = predicates
 
     def clone(self, **kw):
@@ -373,7 +429,10 @@ class ViewDirective(Directive):
             app=self.configurable,
             model=self.model,
             render=self.render,
-            permission=self.permission)
+            permission=self.permission,
+            etag=self.etag,
+            last_modified=self.last_modified,
+            cache=self.cache)
         args.update(self.predicates)
         args.update(kw)
         return ViewDirective(**args)
@@ -386,12 +445,15 @@ class ViewDirective(Directive):
 
     def perform(self, app, obj):
         register_view(app, self.model, obj, self.render, self.permission,
-                      self.predicates)
+                      self.predicates, self.etag, self.last_modified,
+                      self.cache)
 
 
 @directive('json')
 class JsonDirective(ViewDirective):
-    def __init__(self, app, model, render=None, permission=None, **predicates):
+    def __init__(self, app, model, render=None, permission=None,
+                 stream=False, etag=None, last_modified=None, cache=None,
+                 **predicates):
         """Register JSON view.
 
         This is like :meth:`morepath.AppBase.view`, but with
@@ -407,9 +469,20 @@ class JsonDirective(ViewDirective):
         :param render: an optional function that can render the output of the
           view function to a response, and possibly set headers such as
           ``Content-Type``, etc. Renders as JSON by default.
+        :param stream: if ``True``, a list or other iterable returned
+          by the view function, such as a generator, is streamed as
+          a JSON array with :func:`morepath.render_json_stream`.
         :param permission: a permission class. The model should have this
           permission, otherwise access to this view is forbidden. If omitted,
           the view function is public.
+        :param etag: an optional function that gets ``self`` and
+          ``request`` and returns an ETag for conditional requests. See
+          :meth:`AppBase.view`.
+        :param last_modified: an optional function that gets ``self``
+          and ``request`` and returns the modification date for
+          conditional requests. See :meth:`AppBase.view`.
+        :param cache: an optional :class:`morepath.ResponseCache` to
+          cache the rendered response in. See :meth:`AppBase.view`.
         :param name: the name of the view as it appears in the URL. If omitted,
           it is the empty string, meaning the default view for the model.
           This is a predicate.
@@ -419,14 +492,17 @@ class JsonDirective(ViewDirective):
         :param predicates: predicates to match this view on. See the
           documentation of :meth:`AppBase.view` for more information.
         """
-        render = render or render_json
+        if render is None:
+            render = stream and render_json_stream or render_json
         super(JsonDirective, self).__init__(app, model, render, permission,
+                                            etag, last_modified, cache,
                                             **predicates)
 
 
 @directive('html')
 class HtmlDirective(ViewDirective):
-    def __init__(self, app, model, render=None, permission=None, **predicates):
+    def __init__(self, app, model, render=None, permission=None,
+                 etag=None, last_modified=None, cache=None, **predicates):
         """Register HTML view.
 
         This is like :meth:`morepath.AppBase.view`, but with
@@ -444,6 +520,14 @@ class HtmlDirective(ViewDirective):
         :param permission: a permission class. The model should have this
           permission, otherwise access to this view is forbidden. If omitted,
           the view function is public.
+        :param etag: an optional function that gets ``self`` and
+          ``request`` and returns an ETag for conditional requests. See
+          :meth:`AppBase.view`.
+        :param last_modified: an optional function that gets ``self``
+          and ``request`` and returns the modification date for
+          conditional requests. See :meth:`AppBase.view`.
+        :param cache: an optional :class:`morepath.ResponseCache` to
+          cache the rendered response in. See :meth:`AppBase.view`.
         :param name: the name of the view as it appears in the URL. If omitted,
           it is the empty string, meaning the default view for the model.
           This is a predicate.
@@ -455,6 +539,7 @@ class HtmlDirective(ViewDirective):
         """
         render = render or render_html
         super(HtmlDirective, self).__init__(app, model, render, permission,
+                                            etag, last_modified, cache,
                                             **predicates)
 
 
@@ -0,0 +1,82 @@
+from reg import Matcher, Sentinel, mapply
+
+NO_DEFAULT = Sentinel('NO_DEFAULT')
+NOT_FOUND = Sentinel('NOT_FOUND')
+UNCACHEABLE = Sentinel('UNCACHEABLE')
+
+
+class DispatchCache(object):
+    """Memoize what generic functions dispatch to.
+
+    Calling a generic function looks up the registered function for
+    the classes of the arguments each time. This cache remembers the
+    result of that lookup per generic function, lookup and argument
+    classes, so that the next call with the same classes only costs a
+    dictionary lookup.
+
+    Components that are a :class:`reg.Matcher` depend on the
+    arguments themselves, not just on their classes, so these are
+    looked up each time.
+
+    The cache needs to be cleared when the registrations change. An
+    app does this when its configuration is committed.
+    """
+    def __init__(self):
+        self._table = {}
+
+    def clear(self):
+        """Forget all memoized components.
+        """
+        self._table.clear()
+
+    def __len__(self):
+        return len(self._table)
+
+    def component(self, func, lookup, classes):
+        """Get the component registered for func and argument classes.
+
+        :param func: the generic function.
+        :param lookup: the :class:`reg.Lookup` to look in.
+        :param classes: tuple of argument classes.
+        :returns: the registered component, or the special
+          values ``NOT_FOUND`` or ``UNCACHEABLE``.
+        """
+        key = (func, lookup, classes)
+        try:
+            return self._table[key]
+        except KeyError:
+            pass
+        result = lookup.class_lookup.get(func, classes)
+        if result is None:
+            result = NOT_FOUND
+        elif isinstance(result, Matcher):
+            result = UNCACHEABLE
+        self._table[key] = result
+        return result
+
+    def call(self, func, lookup, *args, **kw):
+        """Call generic function, using the memoized component.
+
+        This behaves like ``func(*args, lookup=lookup, **kw)``.
+
+        :param func: the generic function.
+        :param lookup: the :class:`reg.Lookup` to use.
+        :param args: the arguments to dispatch on.
+        :param kw: extra keyword arguments, including ``default``.
+        """
+        default = kw.pop('default', NO_DEFAULT)
+        component = self.component(
+            func, lookup, tuple([arg.__class__ for arg in args]))
+        if component is NOT_FOUND:
+            if default is not NO_DEFAULT:
+                return default
+            # the generic function provides the fallback
+            return func(*args, lookup=lookup, **kw)
+        if component is UNCACHEABLE:
+            if default is not NO_DEFAULT:
+                kw['default'] = default
+            return func(*args, lookup=lookup, **kw)
+        result = mapply(component, *args, lookup=lookup, **kw)
+        if result is None and default is not NO_DEFAULT:
+            return default
+        return result
@@ -0,0 +1,134 @@
+"""JSON encoder backends.
+
+The JSON encoder used by :func:`morepath.render_json` and
+:func:`morepath.render_json_stream` for the views of an app is
+configured with the ``json`` setting section. The ``backend`` setting
+selects an encoder registered with :func:`json_backend`. The default,
+``auto``, uses the fastest installed encoder that gives the same output
+as the ``json`` module of the standard library, falling back to that
+module itself.
+"""
+import json
+from .error import ConfigError
+
+
+JSON_BACKENDS = {}
+"""Dictionary of backend names -> encoder factories."""
+
+AUTO_BACKENDS = ['simplejson', 'json']
+"""Backends tried in this order if the backend is ``auto``.
+
+``ujson`` is not among them, as it formats floats and escapes strings
+differently from the standard library.
+"""
+
+
+def json_backend(name):
+    """Register an encoder factory for a JSON backend.
+
+    The factory gets the ``separators``, ``ensure_ascii``,
+    ``sort_keys`` and ``default`` settings as keyword arguments, and
+    should return a function that encodes an object to a JSON string.
+    It should return ``None`` if the backend is not installed or does
+    not support the settings.
+    """
+    def wrapper(factory):
+        JSON_BACKENDS[name] = factory
+        return factory
+    return wrapper
+
+
+@json_backend('json')
+def stdlib_encoder(separators=None, ensure_ascii=True, sort_keys=False,
+                   default=None):
+    return json.JSONEncoder(separators=separators,
+                            ensure_ascii=ensure_ascii,
+                            sort_keys=sort_keys,
+                            default=default).encode
+
+
+@json_backend('simplejson')
+def simplejson_encoder(separators=None, ensure_ascii=True, sort_keys=False,
+                       default=None):
+    try:
+        import simplejson
+    except ImportError:
+        return None
+    # like the standard library, don't encode namedtuples as objects
+    # and leave Decimals to default
+    return simplejson.JSONEncoder(separators=separators,
+                                  ensure_ascii=ensure_ascii,
+                                  sort_keys=sort_keys,
+                                  default=default,
+                                  namedtuple_as_object=False,
+                                  use_decimal=False).encode
+
+
+@json_backend('ujson')
+def ujson_encoder(separators=None, ensure_ascii=True, sort_keys=False,
+                  default=None):
+    # ujson always writes compact JSON and has no default hook
+    if default is not None or tuple(separators or ()) != (',', ':'):
+        return None
+    try:
+        import ujson
+    except ImportError:
+        return None
+
+    def encode(obj):
+        return ujson.dumps(obj, ensure_ascii=ensure_ascii,
+                           sort_keys=sort_keys,
+                           escape_forward_slashes=False)
+    return encode
+
+
+def get_json_encoder(backend='auto', **options):
+    """Get a function that encodes objects to JSON strings.
+
+    :param backend: the name of a backend registered with
+      :func:`json_backend`, or ``auto`` to use the first available one
+      of :data:`AUTO_BACKENDS`.
+    :param options: ``separators``, ``ensure_ascii``, ``sort_keys``
+      and ``default`` as for :func:`json.dumps`.
+    :returns: a function that takes an object and returns a string.
+    """
+    if backend == 'auto':
+        names = AUTO_BACKENDS
+    else:
+        names = [backend]
+    for name in names:
+        factory = JSON_BACKENDS.get(name)
+        if factory is None:
+            raise ConfigError("Unknown JSON backend: %s" % name)
+        encode = factory(**options)
+        if encode is not None:
+            return encode
+    raise ConfigError(
+        "JSON backend %s is not installed or does not support "
+        "the json settings" % backend)
+
+
+def json_item_separator(settings):
+    """Get the separator between items of JSON arrays.
+
+    :param settings: the ``json`` setting section, or ``None``.
+    """
+    separators = getattr(settings, 'separators', None)
+    if separators is None:
+        return ', '
+    return separators[0]
+
+
+def json_encoder_from_settings(settings):
+    """Get JSON encoder for the ``json`` setting section.
+
+    :param settings: the ``json`` setting section, or ``None``.
+    """
+    if settings is None:
+        return get_json_encoder()
+    return get_json_encoder(
+        getattr(settings, 'backend', 'auto'),
+        separators=getattr(settings, 'separators', None),
+        ensure_ascii=getattr(settings, 'ensure_ascii', True),
+        sort_keys=getattr(settings, 'sort_keys', False),
+        default=getattr(settings, 'default', None))
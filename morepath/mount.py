@@ -1,4 +1,6 @@
-from .path import register_path, get_arguments, SPECIAL_ARGUMENTS
+from morepath import generic
+from .path import (register_path, get_arguments, SPECIAL_ARGUMENTS,
+                   FactoryCaller)
 from .reify import reify
 from reg import mapply
 
@@ -33,12 +35,29 @@ class Mount(object):
         request = self.app.request(environ)
         request.mounts.append(self)
         response = self.app.publish(request)
+        # the link maker refers back to the request; drop it so that
+        # the request is freed without the cyclic garbage collector.
+        # It is created again if the response still makes links.
+        request.__dict__.pop('linkmaker', None)
         return response(environ, start_response)
 
     @reify
     def parent(self):
         return self.variables.get('parent')
 
+    @reify
+    def prefix(self):
+        """Path and parameters that link to this mount.
+
+        This includes the parents of the mount. It is calculated once
+        and then cached on the mount, which normally lives as long as
+        the request.
+
+        :returns: a ``(path, parameters)`` tuple as returned by
+          :func:`get_mount_prefix`.
+        """
+        return get_mount_prefix(self)
+
     def child(self, app, **context):
         factory = self.app._mounted.get(app)
         if factory is None:
@@ -51,12 +70,52 @@ class Mount(object):
         return mounted
 
 
+def get_mount_prefix(mounted):
+    """Get path and parameters to mounted app, through its parents.
+
+    :returns: ``(path, parameters)`` tuple. The path is ``None`` if
+      the mounted app has no parent.
+    """
+    result = []
+    parameters = {}
+    model = mounted
+    mounted = mounted.parent
+    while mounted is not None:
+        path, params = generic.path(model, lookup=mounted.lookup)
+        result.append(path)
+        parameters.update(params)
+        model = mounted
+        mounted = mounted.parent
+    if not result:
+        return None, parameters
+    result.reverse()
+    return '/'.join(result), parameters
+
+
+def add_mount_prefix(path, parameters, prefix, prefix_parameters):
+    """Combine path and parameters with that of a mount prefix.
+
+    The prefix is as returned by :func:`get_mount_prefix`.
+    """
+    if prefix is not None:
+        path = prefix + '/' + path
+    if prefix_parameters:
+        parameters = parameters.copy()
+        parameters.update(prefix_parameters)
+    return path.strip('/'), parameters
+
+
 def register_mount(base_app, app, path, converters, required, get_converters,
                    context_factory):
+    context_caller = FactoryCaller(context_factory)
+
     # specific class as we want a different one for each mount
     class SpecificMount(Mount):
         def __init__(self, **kw):
             super(SpecificMount, self).__init__(app, context_factory, kw)
+
+        def create_context(self):
+            return context_caller(self.variables)
     # need to construct argument info from context_factory, not SpecificMount
     arguments = get_arguments(context_factory, SPECIAL_ARGUMENTS)
     register_path(base_app, SpecificMount, path, lambda m: m.variables,
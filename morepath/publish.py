@@ -1,6 +1,5 @@
 from morepath import generic
 from .mount import Mount
-from .traject import create_path
 from webob.exc import HTTPNotFound
 
 
@@ -18,11 +17,12 @@ def resolve_model(request):
     """Resolve path to a model using consumers.
     """
     lookup = request.lookup  # XXX can get this from argument too
+    call = request.dispatch_cache.call
     mounts = request.mounts
     model = mounts[-1]
     model.set_implicit()
-    while request.unconsumed:
-        next_model = generic.consume(request, model, lookup=lookup)
+    while request.has_unconsumed():
+        next_model = call(generic.consume, lookup, request, model)
         if next_model is None:
             return model
         model = next_model
@@ -30,11 +30,11 @@ def resolve_model(request):
             model.set_implicit()
             mounts.append(model)
         # get new lookup for whatever we found if it exists
-        lookup = generic.lookup(model, lookup=lookup, default=lookup)
+        lookup = call(generic.lookup, lookup, model, default=lookup)
         request.lookup = lookup
     # if there is nothing (left), we consume toward a root model
-    if not request.unconsumed and isinstance(model, Mount):
-        root_model = generic.consume(request, model, lookup=lookup)
+    if not request.has_unconsumed() and isinstance(model, Mount):
+        root_model = call(generic.consume, lookup, request, model)
         if root_model is not None:
             model = root_model
         # XXX handling mounting? lookups? write test cases
@@ -43,7 +43,8 @@ def resolve_model(request):
 
 
 def resolve_response(request, model):
-    request.view_name = get_view_name(request.unconsumed)
+    segments, pos = request.get_segments()
+    request.view_name = get_segments_view_name(segments, pos)
 
     response = generic.response(request, model, default=RESPONSE_SENTINEL,
                                 lookup=request.lookup)
@@ -53,15 +54,21 @@ def resolve_response(request, model):
 
 
 def get_view_name(stack):
-    unconsumed_amount = len(stack)
+    return get_segments_view_name(stack[::-1], 0)
+
+
+def get_segments_view_name(segments, pos):
+    """Get view name from segments in path order.
+
+    Raises :exc:`webob.exc.HTTPNotFound` if more than one segment
+    is left unconsumed.
+    """
+    unconsumed_amount = len(segments) - pos
     if unconsumed_amount > 1:
         raise HTTPNotFound()
     elif unconsumed_amount == 0:
         return DEFAULT_NAME
-    elif unconsumed_amount == 1:
-        return stack[0].lstrip('+')
-    assert False, ("Unconsumed stack: %s" %
-                   create_path(stack))  # pragma: nocoverage
+    return segments[pos].lstrip('+')
 
 
 def publish(request):
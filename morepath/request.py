@@ -1,13 +1,19 @@
 from morepath import generic
 from webob import BaseRequest, Response as BaseResponse
 from .reify import reify
-from .traject import parse_path
+from .traject import parse_segments, Inverse
+from .mount import add_mount_prefix
 from .error import LinkError
+from .dispatch import DispatchCache
+from .converter import parse_query
 import urllib
 import reg
 
 
 NO_DEFAULT = reg.Sentinel('NO_DEFAULT')
+NO_INVERSE = reg.Sentinel('NO_INVERSE')
+# shared by requests that have no after functions
+EMPTY = ()
 
 
 class Request(BaseRequest):
@@ -15,11 +21,73 @@ class Request(BaseRequest):
 
     Extends :class:`webob.request.BaseRequest`
     """
+    link_memo = None
+    """Dictionary used to memoize :meth:`Request.link`, or ``None``.
+
+    Set up by the app if the ``link.memoize`` setting is enabled.
+    """
+
+    # these are only stored on the instance once they change, so that
+    # creating a request doesn't need to parse the path or allocate
+    # lists it may not need
+    _segments = None
+    _consumed = 0
+    _unconsumed = None
+    _after = EMPTY
+
     def __init__(self, environ):
         super(Request, self).__init__(environ)
-        self.unconsumed = parse_path(self.path_info)
         self.mounts = []
-        self._after = []
+
+    @property
+    def unconsumed(self):
+        """Stack of path segments that are not consumed yet.
+
+        The last segment of the path is first on the stack. This list
+        is only created when you access it; Morepath itself keeps track
+        of consumed segments with :meth:`get_segments` and
+        :meth:`set_consumed`. You can modify the list and assign a new
+        one.
+        """
+        if self._unconsumed is None:
+            stack = self.get_segments()[0][self._consumed:]
+            stack.reverse()
+            self._unconsumed = stack
+        return self._unconsumed
+
+    @unconsumed.setter
+    def unconsumed(self, stack):
+        self._unconsumed = stack
+
+    def get_segments(self):
+        """Get path segments and the index of the first unconsumed one.
+
+        :returns: a ``(segments, pos)`` tuple. ``segments`` is a list
+          of all path segments in path order. It should not be modified.
+        """
+        if self._unconsumed is not None:
+            # someone used the unconsumed stack, so it is leading
+            self._segments = self._unconsumed[::-1]
+            self._consumed = 0
+            self._unconsumed = None
+        elif self._segments is None:
+            self._segments = parse_segments(self.path_info)
+        return self._segments, self._consumed
+
+    def set_consumed(self, pos):
+        """Mark path segments as consumed.
+
+        :param pos: the index of the first unconsumed segment in the
+          segments returned by :meth:`get_segments`.
+        """
+        self._consumed = pos
+
+    def has_unconsumed(self):
+        """Return ``True`` if there are path segments left to consume.
+        """
+        if self._unconsumed is not None:
+            return bool(self._unconsumed)
+        return self._consumed < len(self.get_segments()[0])
 
     @reify
     def identity(self):
@@ -39,10 +107,41 @@ class Request(BaseRequest):
         return generic.identify(self, lookup=self.lookup,
                                 default=NO_IDENTITY)
 
+    @reify
+    def query_parameters(self):
+        """URL parameters as a dictionary of names to lists of values.
+
+        The query string is parsed once, the first time this is
+        accessed. Morepath uses it to decode the URL parameters for
+        models; views can use it as a lighter alternative to
+        ``request.GET``. It should not be modified.
+        """
+        return parse_query(self.environ.get('QUERY_STRING', ''))
+
+    @reify
+    def dispatch_cache(self):
+        """:class:`morepath.dispatch.DispatchCache` used to publish.
+
+        The app shares its own cache with the request, so that it
+        is reused between requests. Otherwise a request gets a fresh one.
+        """
+        return DispatchCache()
+
     @reify
     def mounted(self):
         return self.mounts[-1]
 
+    @reify
+    def linkmaker(self):
+        """Link maker for the mounted app.
+
+        It is created once per request and dropped again once the
+        request is published. :meth:`Request.link`,
+        :meth:`Request.view`, :attr:`Request.parent` and
+        :meth:`Request.child` delegate to it.
+        """
+        return generic.linkmaker(self, self.mounted, lookup=self.lookup)
+
     def view(self, obj, default=None, **predicates):
         """Call view for model instance.
 
@@ -57,8 +156,7 @@ class Request(BaseRequest):
           and the default ``request_method`` is ``GET``. If you introduce
           your own predicates you can specify your own default.
         """
-        return generic.linkmaker(self, self.mounted, lookup=self.lookup).view(
-            obj, default, **predicates)
+        return self.linkmaker.view(obj, default, **predicates)
 
     def link(self, obj, name='', default=None):
         """Create a link (URL) to a view on a model instance.
@@ -75,8 +173,35 @@ class Request(BaseRequest):
           returned. By default this is ``None``.
 
         """
-        return generic.linkmaker(self, self.mounted,
-                                 lookup=self.lookup).link(obj, name, default)
+        memo = self.link_memo
+        if memo is None or obj is None:
+            return self.linkmaker.link(obj, name, default)
+        key = (id(obj), name, self.mounted)
+        memoized = memo.get(key)
+        # we store obj too so that its id cannot be reused during
+        # the request
+        if memoized is not None and memoized[0] is obj:
+            return memoized[1]
+        result = self.linkmaker.link(obj, name, default)
+        memo[key] = obj, result
+        return result
+
+    def link_many(self, objs, name='', default=None):
+        """Create links (URLs) to a view on many model instances.
+
+        The result is the same as calling :meth:`Request.link` for
+        each object, but this is faster, especially if the objects
+        are of the same class.
+
+        :param objs: iterable of model instances to link to. It may
+          contain ``None``.
+        :param name: the name of the view to link to. If omitted, the
+          the default view is looked up.
+        :param default: the value in the result for each ``None`` in
+          ``objs``. By default this is ``None``.
+        :returns: a list of links.
+        """
+        return self.linkmaker.link_many(objs, name, default)
 
     @reify
     def parent(self):
@@ -85,16 +210,18 @@ class Request(BaseRequest):
         Get an object that represents the parent app that this app is mounted
         inside. You can call ``link`` and ``view`` on it.
         """
-        return generic.linkmaker(self, self.mounted.parent, lookup=self.lookup)
+        return self.linkmaker.parent
 
     def child(self, app, **variables):
         """Obj to call :meth:`Request.link` or :meth:`Request.view` on child.
 
         Get an object that represents the application mounted in this app.
         You can call ``link`` and ``view`` on it.
+
+        The object is created once per request for the same app and
+        variables.
         """
-        return generic.linkmaker(self, self.mounted.child(app, **variables),
-                                 lookup=self.lookup)
+        return self.linkmaker.child(app, **variables)
 
     def after(self, func):
         """Call function with response after this request is done.
@@ -114,6 +241,8 @@ class Request(BaseRequest):
         :param func: callable that is called with response
         :returns: func argument, not wrapped
         """
+        if self._after is EMPTY:
+            self._after = []
         self._after.append(func)
         return func
 
@@ -130,6 +259,9 @@ class Response(BaseResponse):
 
 
 class LinkMaker(object):
+    # link makers for children by app and variables, created on demand
+    _children = None
+
     def __init__(self, request, mounted):
         self.request = request
         self.mounted = mounted
@@ -139,14 +271,39 @@ class LinkMaker(object):
             return default
         path, parameters = generic.link(
             self.request, obj, self.mounted, lookup=self.mounted.lookup)
-        parts = []
-        if path:
-            parts.append(path)
-        if name:
-            parts.append(name)
-        result = '/' + '/'.join(parts)
-        if parameters:
-            result += '?' + urllib.urlencode(parameters, True)
+        return make_url(path, parameters, name)
+
+    def link_many(self, objs, name='', default=None):
+        # XXX annoying circular dependency
+        from .core import link as default_link
+        request = self.request
+        mounted = self.mounted
+        lookup = mounted.lookup
+        inverses = {}
+        result = []
+        for obj in objs:
+            if obj is None:
+                result.append(default)
+                continue
+            inverse = inverses.get(obj.__class__, NO_INVERSE)
+            if inverse is NO_INVERSE:
+                inverse = None
+                # we can only take a shortcut if the standard link
+                # implementation is in use
+                if generic.link.component(request, obj, mounted,
+                                          lookup=lookup) is default_link:
+                    inverse = generic.path.component(obj, lookup=lookup,
+                                                     default=None)
+                    if not isinstance(inverse, Inverse):
+                        inverse = None
+                inverses[obj.__class__] = inverse
+            if inverse is None:
+                result.append(self.link(obj, name, default))
+                continue
+            path, parameters = inverse(obj)
+            path, parameters = add_mount_prefix(path, parameters,
+                                                *mounted.prefix)
+            result.append(make_url(path, parameters, name))
         return result
 
     def view(self, obj, default=None, **predicates):
@@ -163,11 +320,38 @@ class LinkMaker(object):
                                  lookup=self.mounted.lookup)
 
     def child(self, app, **variables):
+        try:
+            key = (app, frozenset(variables.items()))
+            hash(key)
+        except TypeError:
+            # unhashable variables, so we cannot cache
+            return self.create_child(app, variables)
+        children = self._children
+        if children is None:
+            children = self._children = {}
+        result = children.get(key)
+        if result is None:
+            result = children[key] = self.create_child(app, variables)
+        return result
+
+    def create_child(self, app, variables):
         return generic.linkmaker(self.request,
                                  self.mounted.child(app, **variables),
                                  lookup=self.mounted.lookup)
 
 
+def make_url(path, parameters, name):
+    parts = []
+    if path:
+        parts.append(path)
+    if name:
+        parts.append(name)
+    result = '/' + '/'.join(parts)
+    if parameters:
+        result += '?' + urllib.urlencode(parameters, True)
+    return result
+
+
 class NothingMountedLinkMaker(object):
     def __init__(self, request):
         self.request = request
@@ -175,6 +359,9 @@ class NothingMountedLinkMaker(object):
     def link(self, obj, name='', default=None):
         raise LinkError("Cannot link to %r (name %r)" % (obj, name))
 
+    def link_many(self, objs, name='', default=None):
+        return [self.link(obj, name, default) for obj in objs]
+
     def view(self, obj, default=None, **predicates):
         raise LinkError("Cannot view %r (predicates %r)" % (obj, predicates))
 
@@ -0,0 +1,258 @@
+"""Server-side cache for the responses of views.
+
+A :class:`ResponseCache` can be passed as the ``cache`` option of the
+view directives. The response of the view is then stored the first
+time it is rendered and reused for later requests, without calling the
+view function.
+
+Responses are stored in a storage backend. :class:`MemoryStorage`
+keeps them in the process, :class:`FileStorage` in a directory, so
+that several processes can share them.
+"""
+from hashlib import sha1
+import os
+import time
+import cPickle as pickle
+from tempfile import mkstemp
+from .cache import LRUCache
+from .error import LinkError
+from .request import Response
+
+
+def digest(s):
+    """Hex digest of a string, encoding unicode as UTF-8."""
+    if isinstance(s, unicode):
+        s = s.encode('utf-8')
+    return sha1(s).hexdigest()
+
+
+class MemoryStorage(object):
+    """Store responses in memory.
+
+    Least recently used entries are evicted when the storage is full.
+    """
+    def __init__(self, size=1000, ttl=None, clock=time.time):
+        """
+        :param size: the maximum amount of responses to store.
+        :param ttl: the amount of seconds after which a response expires.
+          If ``None``, responses don't expire.
+        :param clock: function that returns the current time in seconds.
+        """
+        self.cache = LRUCache(size, ttl, clock)
+
+    def get(self, key):
+        """Get value for key, or ``None`` if it is not stored."""
+        return self.cache.get(key)
+
+    def put(self, key, value):
+        """Store value for key."""
+        self.cache.put(key, value)
+
+    def invalidate(self, url):
+        """Remove all values with keys for this URL."""
+        for key in self.cache.keys():
+            if key[0] == url:
+                self.cache.invalidate(key)
+
+    def clear(self):
+        """Remove all values."""
+        self.cache.clear()
+
+
+class FileStorage(object):
+    """Store responses as files in a directory.
+
+    Several processes can share the same directory. When the storage is
+    full, the least recently used files are removed. To avoid listing
+    the directory on every put, this is only checked every
+    ``size / 10`` puts, so the directory can briefly hold a bit more
+    than ``size`` files.
+    """
+    def __init__(self, directory, size=1000, ttl=None, clock=time.time):
+        """
+        :param directory: the directory to store the files in. It is
+          created if it doesn't exist.
+        :param size: the maximum amount of responses to store.
+        :param ttl: the amount of seconds after which a response expires.
+          If ``None``, responses don't expire.
+        :param clock: function that returns the current time in seconds.
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.size = size
+        self.ttl = ttl
+        self.clock = clock
+        self.evict_every = max(1, size // 10)
+        self._puts = 0
+
+    def url_prefix(self, url):
+        return digest(url) + '-'
+
+    def path(self, key):
+        return os.path.join(
+            self.directory,
+            self.url_prefix(key[0]) + digest(repr(key)))
+
+    def get(self, key):
+        """Get value for key, or ``None`` if it is not stored."""
+        path = self.path(key)
+        try:
+            f = open(path, 'rb')
+        except (IOError, OSError):
+            return None
+        try:
+            with f:
+                expires, stored_key, value = pickle.load(f)
+        except Exception:
+            # a corrupt file, or one that refers to code that has
+            # changed, is a miss
+            self.remove(path)
+            return None
+        if stored_key != key:
+            return None
+        if expires is not None and expires <= self.clock():
+            self.remove(path)
+            return None
+        # mark as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """Store value for key."""
+        expires = None
+        if self.ttl is not None:
+            expires = self.clock() + self.ttl
+        # write to a temporary file first so that other processes
+        # never read a partial file
+        fd, temp_path = mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((expires, key, value), f, pickle.HIGHEST_PROTOCOL)
+        os.rename(temp_path, self.path(key))
+        self._puts += 1
+        if self._puts >= self.evict_every:
+            self._puts = 0
+            self.evict()
+
+    def files(self):
+        return [os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if not name.startswith('.')]
+
+    def evict(self):
+        paths = self.files()
+        if len(paths) <= self.size:
+            return
+        mtimes = []
+        for path in paths:
+            try:
+                mtimes.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        mtimes.sort()
+        for mtime, path in mtimes[:len(mtimes) - self.size]:
+            self.remove(path)
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def invalidate(self, url):
+        """Remove all values with keys for this URL."""
+        prefix = self.url_prefix(url)
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix):
+                self.remove(os.path.join(self.directory, name))
+
+    def clear(self):
+        """Remove all values."""
+        for path in self.files():
+            self.remove(path)
+
+
+class ResponseCache(object):
+    """Cache for the responses of views.
+
+    Responses are cached by the URL of the model, the app, the view
+    name, the query string, the values of selected request headers and
+    the userid of the identity. Only successful responses to ``GET`` and
+    ``HEAD`` requests are cached, and not if they set a cookie or are
+    streamed.
+
+    The cache is consulted after the permission of the view has been
+    checked, so a cached response is only served to those who may see
+    it.
+    """
+    def __init__(self, storage=None, headers=(), size=1000, ttl=None):
+        """
+        :param storage: the storage backend, such as
+          :class:`FileStorage`. By default responses are stored in a
+          :class:`MemoryStorage` with the given ``size`` and ``ttl``.
+        :param headers: names of request headers that the response
+          depends on, such as ``Accept-Language``.
+        :param size: the maximum amount of responses in the default
+          storage.
+        :param ttl: the amount of seconds after which a response
+          expires in the default storage.
+        """
+        if storage is None:
+            storage = MemoryStorage(size, ttl)
+        self.storage = storage
+        self.headers = tuple(headers)
+
+    def key(self, request, model):
+        """Get the key of the response for model and request.
+
+        :returns: a tuple that starts with the URL of the model, or
+          ``None`` if the response cannot be cached.
+        """
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        try:
+            url = request.link(model)
+        except LinkError:
+            return None
+        get_header = request.headers.get
+        # the app is identified by its repr, which includes its name,
+        # so that keys can be stored in a FileStorage
+        return (url, repr(request.mounts[-1].app), request.view_name,
+                request.environ.get('QUERY_STRING', ''),
+                tuple([get_header(name) for name in self.headers]),
+                request.identity.userid)
+
+    def get(self, key):
+        """Get the cached response for key, or ``None``."""
+        value = self.storage.get(key)
+        if value is None:
+            return None
+        status, headerlist, body = value
+        response = Response(status=status, headerlist=list(headerlist))
+        response.body = body
+        return response
+
+    def put(self, key, response):
+        """Store response for key if it can be cached."""
+        if (response.status_int != 200 or
+                response.content_length is None or
+                'Set-Cookie' in response.headers):
+            return
+        # copy the headers, as after functions may still change them
+        self.storage.put(key, (response.status, tuple(response.headerlist),
+                               response.body))
+
+    def invalidate(self, url):
+        """Remove the cached responses for the model with this URL.
+
+        :param url: the URL of the model, as created by
+          :meth:`morepath.Request.link` without a view name.
+        """
+        self.storage.invalidate(url)
+
+    def clear(self):
+        """Remove all cached responses."""
+        self.storage.clear()
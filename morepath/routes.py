@@ -0,0 +1,80 @@
+"""Inspect the routes of an application.
+
+Run it from the command line to print the route table of an app::
+
+  $ morepath-routes myproject.main:app
+"""
+import argparse
+import importlib
+import sys
+from .autosetup import autosetup
+from .path import FactoryCaller
+
+
+def routes(app, prefix=''):
+    """Iterate over the routes of an app and the apps mounted in it.
+
+    The configuration of the app needs to be committed.
+
+    :param app: the :class:`morepath.App` to inspect.
+    :param prefix: the path leading up to the app.
+    :returns: iterable of ``(path, app, model_factory)`` tuples. For
+      mounted apps the model factory is the
+      :class:`morepath.mount.Mount` subclass that represents the mount;
+      it is followed by the routes of the mounted app.
+    """
+    mounts = {factory: mounted_app for mounted_app, factory in
+              app._mounted.items()}
+    for pattern, value in app.traject.routes():
+        model_factory = value[0]
+        if isinstance(model_factory, FactoryCaller):
+            model_factory = model_factory.factory
+        path = '/' + '/'.join([s for s in (prefix, pattern) if s])
+        yield path, app, model_factory
+        mounted_app = mounts.get(model_factory)
+        if mounted_app is not None:
+            for route in routes(mounted_app, path.strip('/')):
+                yield route
+
+
+def format_routes(app):
+    """Format the route table of an app as lines of text.
+
+    :param app: the :class:`morepath.App` to inspect.
+    :returns: list of lines.
+    """
+    return ['%s  %s  %s' % (path, route_app, format_factory(model_factory))
+            for path, route_app, model_factory in routes(app)]
+
+
+def format_factory(model_factory):
+    name = getattr(model_factory, '__name__', None)
+    if name is None:
+        return repr(model_factory)
+    return '%s.%s' % (model_factory.__module__, name)
+
+
+def resolve(name):
+    """Resolve a ``module:attribute`` name to an object.
+    """
+    module_name, _, attribute = name.partition(':')
+    module = importlib.import_module(module_name)
+    if not attribute:
+        raise ValueError("Expected module:attribute, got: %s" % name)
+    return getattr(module, attribute)
+
+
+def main(argv=None):  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description="Print the route table of a Morepath app.")
+    parser.add_argument('app', help="the app as module:attribute")
+    args = parser.parse_args(argv)
+    app = resolve(args.app)
+    autosetup()
+    for line in format_routes(app):
+        print line
+    return 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,26 @@
+from morepath.benchmarks.harness import SCENARIOS, run, main
+import json
+import pytest
+
+
+@pytest.mark.parametrize('scenario', SCENARIOS,
+                         ids=[scenario.name for scenario in SCENARIOS])
+def test_scenario(scenario):
+    result = run(scenario, size=3, number=4)
+    assert result['number'] == 4
+    assert result['requests_per_second'] > 0
+    assert result['p50_ms'] <= result['p99_ms']
+
+
+def test_allocations():
+    result = run(SCENARIOS[0], size=3, number=10)
+    # at least the request, its mounts and the response are allocated,
+    # even though they are freed again once the request is done
+    assert result['allocations'] >= 3
+
+
+def test_main(capsys):
+    assert main(['--number', '2', '--size', '2', 'flat']) == 0
+    out, err = capsys.readouterr()
+    result = json.loads(out)
+    assert result['scenarios'].keys() == ['flat']
@@ -0,0 +1,105 @@
+from morepath.cache import LRUCache
+import sys
+import threading
+
+
+def test_lru_cache_get_put():
+    cache = LRUCache(2)
+    assert cache.get('a') is None
+    assert cache.get('a', 'default') == 'default'
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    assert 'a' in cache
+    assert len(cache) == 1
+    assert cache.stats() == {
+        'size': 2, 'entries': 1, 'hits': 1, 'misses': 2, 'evictions': 0}
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    # use a so that b becomes least recently used
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.evictions == 1
+
+
+def test_lru_cache_put_existing_does_not_evict():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 3)
+    assert len(cache) == 2
+    assert cache.get('a') == 3
+    assert cache.evictions == 0
+
+
+def test_lru_cache_invalidate_and_clear():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.invalidate('a')
+    cache.invalidate('nonexistent')
+    assert 'a' not in cache
+    assert 'b' in cache
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_ttl():
+    now = [100.0]
+    cache = LRUCache(2, ttl=10, clock=lambda: now[0])
+    cache.put('a', 1)
+    now[0] = 105.0
+    assert cache.get('a') == 1
+    now[0] = 110.0
+    assert cache.get('a') is None
+    assert 'a' not in cache
+    assert cache.stats() == {
+        'size': 2, 'entries': 0, 'hits': 1, 'misses': 1, 'evictions': 0,
+        'expirations': 1}
+
+
+def test_lru_cache_ttl_put_refreshes():
+    now = [100.0]
+    cache = LRUCache(2, ttl=10, clock=lambda: now[0])
+    cache.put('a', 1)
+    now[0] = 108.0
+    cache.put('a', 2)
+    now[0] = 115.0
+    assert cache.get('a') == 2
+
+
+def test_lru_cache_threads():
+    cache = LRUCache(8)
+    errors = []
+
+    def work(n):
+        try:
+            for i in range(2000):
+                key = (n * 7 + i) % 20
+                cache.get(key)
+                cache.put(key, i)
+                if i % 100 == 0:
+                    cache.invalidate(key)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    # switch threads as often as possible to provoke races
+    interval = sys.getcheckinterval()
+    sys.setcheckinterval(1)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setcheckinterval(interval)
+    assert errors == []
+    assert len(cache) <= 8
+    assert len(cache.keys()) == len(cache)
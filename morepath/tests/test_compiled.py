@@ -0,0 +1,183 @@
+import morepath
+from morepath import setup
+from morepath.compiled import has_default_predicates
+from webtest import TestApp as Client
+import pytest
+
+
+def create_app(compiled):
+    config = setup()
+    app = morepath.App('app', testing_config=config)
+    mounted = morepath.App('mounted', variables=['mount_id'],
+                           testing_config=config)
+
+    @app.setting('publish', 'compiled')
+    def get_compiled():
+        return compiled
+
+    class Permission(object):
+        pass
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.view(model=Root)
+    def root_default(self, request):
+        return 'hello'
+
+    @app.view(model=Root, name='edit', request_method='POST')
+    def root_edit(self, request):
+        return 'edited'
+
+    @app.view(model=Root, name='secret', permission=Permission)
+    def root_secret(self, request):
+        return 'secret'
+
+    @app.json(model=Root, name='json')
+    def root_json(self, request):
+        return {'hello': 'world'}
+
+    @app.view(model=Root, name='error')
+    def root_error(self, request):
+        raise ValueError()
+
+    @app.view(model=ValueError)
+    def value_error(self, request):
+        return 'value error'
+
+    @mounted.path(path='models/{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @mounted.view(model=Model)
+    def model_default(self, request):
+        return 'model %s' % self.id
+
+    @mounted.predicate(name='extra', order=2, default='')
+    def extra_predicate(self, request):
+        return request.GET.get('extra', '')
+
+    @mounted.view(model=Model, name='extra', extra='yes')
+    def model_extra(self, request):
+        return 'extra'
+
+    @app.mount(path='{id}', app=mounted)
+    def get_context(id):
+        return {
+            'mount_id': id
+            }
+
+    config.commit()
+    return app
+
+
+REQUESTS = [
+    ('get', '/', 200),
+    ('get', '/+edit', 405),
+    ('post', '/+edit', 200),
+    ('get', '/+secret', 401),
+    ('get', '/+json', 200),
+    ('get', '/+error', 200),
+    ('get', '/+missing', 404),
+    ('get', '/foo/models/1', 200),
+    ('get', '/foo/models/1/extra?extra=yes', 200),
+    ('get', '/foo/models/1/extra', 404),
+    ('get', '/foo/missing/1', 404),
+]
+
+
+@pytest.mark.parametrize('method,path,status', REQUESTS)
+def test_compiled_same_as_normal(method, path, status):
+    normal = Client(create_app(False))
+    compiled = Client(create_app(True))
+    normal_response = getattr(normal, method)(path, status=status)
+    compiled_response = getattr(compiled, method)(path, status=status)
+    assert compiled_response.body == normal_response.body
+    assert compiled_response.content_type == normal_response.content_type
+
+
+def test_compiled_publish_setting():
+    app = create_app(True)
+    assert app.publish.__name__ == 'publish_with_excview'
+    app = create_app(False)
+    assert app.publish.__name__ == 'excview_tween'
+
+
+def test_compiled_publish_with_tween():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    @app.setting('publish', 'compiled')
+    def get_compiled():
+        return True
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.view(model=Root)
+    def root_default(self, request):
+        return 'hello'
+
+    @app.tween_factory()
+    def get_tween(app, handler):
+        def tween(request):
+            response = handler(request)
+            response.headers['Tween-Header'] = 'yes'
+            return response
+        return tween
+
+    config.commit()
+
+    c = Client(app)
+    response = c.get('/')
+    assert response.body == 'hello'
+    assert response.headers['Tween-Header'] == 'yes'
+
+
+def test_compiled_custom_response():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    @app.setting('publish', 'compiled')
+    def get_compiled():
+        return True
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.function(morepath.generic.response, morepath.Request, Root)
+    def root_response(request, model):
+        return morepath.Response('custom')
+
+    config.commit()
+
+    c = Client(app)
+    response = c.get('/')
+    assert response.body == 'custom'
+
+
+def test_publish_recomposed_on_commit():
+    config = setup()
+    app = morepath.App(testing_config=config)
+    config.commit()
+    first = app.publish
+    config.commit()
+    assert app.publish is not first
+
+
+def test_has_default_predicates():
+    config = setup()
+    app = morepath.App(testing_config=config)
+    other = morepath.App(testing_config=config)
+
+    @other.predicate(name='extra', order=2, default='')
+    def extra_predicate(self, request):
+        return ''
+
+    config.commit()
+    assert has_default_predicates(app)
+    assert not has_default_predicates(other)
@@ -1,7 +1,15 @@
 from morepath.converter import (ConverterRegistry, Converter,
+                                CachingConverter,
                                 ListConverter,
                                 IDENTITY_CONVERTER)
+from morepath.core import (date_decode, date_encode,
+                           datetime_decode, datetime_encode,
+                           time_decode, time_encode,
+                           ISO_DATE_CONVERTER, ISO_DATETIME_CONVERTER,
+                           ISO_TIME_CONVERTER)
 from morepath.error import DirectiveError
+from datetime import date, datetime, time
+from time import mktime, strptime
 import pytest
 
 
@@ -98,3 +106,137 @@ def test_converter_equality():
     assert l0 == l2
     assert l1 != l3
     assert not l1 == l3
+
+
+def test_caching_converter():
+    decoded = []
+
+    def decode(s):
+        decoded.append(s)
+        return int(s)
+
+    c = CachingConverter(Converter(decode), 10)
+    assert c.decode(['1']) == 1
+    assert c.decode(['1']) == 1
+    assert decoded == ['1']
+    assert c.encode(1) == [u'1']
+    assert c.encode(1) == [u'1']
+    assert c.stats() == {
+        'decode': {'size': 10, 'entries': 1, 'hits': 1, 'misses': 1,
+                   'evictions': 0},
+        'encode': {'size': 10, 'entries': 1, 'hits': 1, 'misses': 1,
+                   'evictions': 0}}
+
+
+def test_caching_converter_decode_error_not_cached():
+    c = CachingConverter(Converter(int), 10)
+    with pytest.raises(ValueError):
+        c.decode(['foo'])
+    assert len(c.decode_cache) == 0
+
+
+def test_caching_converter_unhashable():
+    c = CachingConverter(Converter(lambda s: s.split(','),
+                                   lambda l: ','.join(l)), 10)
+    assert c.encode(['a', 'b']) == ['a,b']
+    assert len(c.encode_cache) == 0
+
+
+def test_caching_converter_distinguishes_types():
+    c = CachingConverter(Converter(int, repr), 10)
+    assert c.encode(1) == ['1']
+    assert c.encode(True) == ['True']
+
+
+def test_caching_converter_list():
+    c = ListConverter(CachingConverter(Converter(int), 10))
+    assert c.decode(['1', '2', '1']) == [1, 2, 1]
+    assert c.converter.decode_cache.hits == 1
+
+
+def test_caching_converter_equality():
+    int_converter = Converter(int)
+    c = CachingConverter(int_converter, 10)
+    assert c == int_converter
+    assert int_converter == c
+    assert c == CachingConverter(int_converter, 5)
+    assert c != Converter(float)
+    assert Converter(float) != c
+
+
+def test_converter_registry_cache():
+    r = ConverterRegistry()
+    c = Converter(int, unicode)
+    r.register_converter(int, c, cache_size=10)
+    cached = r.converter_for_type(int)
+    assert isinstance(cached, CachingConverter)
+    assert cached.converter is c
+    assert r.converter_cache_stats()[int]['decode']['size'] == 10
+    r.register_converter(int, c)
+    assert r.converter_for_type(int) is c
+    assert r.converter_cache_stats() == {}
+
+
+def test_converter_registry_cache_only_converter():
+    r = ConverterRegistry()
+    with pytest.raises(DirectiveError):
+        r.register_converter(list, ListConverter(IDENTITY_CONVERTER),
+                             cache_size=10)
+
+
+def test_date_converter():
+    assert date_decode('20140408') == date(2014, 4, 8)
+    assert date_encode(date(2014, 4, 8)) == '20140408'
+    assert date_encode(date(14, 4, 8)) == '00140408'
+    for s in ['201404081', '20141308', 'x0140408', '', '20140408\n']:
+        with pytest.raises(ValueError):
+            date_decode(s)
+
+
+def test_date_converter_same_as_strptime():
+    # including fields that are not zero-padded
+    for s in ['20140408', '20000229', '19991231', '2014048', '201411']:
+        assert date_decode(s) == date.fromtimestamp(
+            mktime(strptime(s, '%Y%m%d')))
+
+
+def test_datetime_converter():
+    assert datetime_decode('20140408T130502') == datetime(
+        2014, 4, 8, 13, 5, 2)
+    assert datetime_encode(datetime(2014, 4, 8, 13, 5, 2)) == (
+        '20140408T130502')
+    for s in ['20140408130502', '20140408T250502', '20140408X130502']:
+        with pytest.raises(ValueError):
+            datetime_decode(s)
+
+
+def test_datetime_converter_same_as_strptime():
+    for s in ['20140408T130502', '2014048T130502', '20140408T1352',
+              '20140408T152']:
+        assert datetime_decode(s) == datetime.fromtimestamp(
+            mktime(strptime(s, '%Y%m%dT%H%M%S')))
+
+
+def test_time_converter():
+    assert time_decode('130502') == time(13, 5, 2)
+    assert time_encode(time(13, 5, 2)) == '130502'
+    for s in ['1305', '250502', '13:05:02']:
+        with pytest.raises(ValueError):
+            time_decode(s)
+
+
+def test_iso_converters():
+    assert ISO_DATE_CONVERTER.decode(['2014-04-08']) == date(2014, 4, 8)
+    assert ISO_DATE_CONVERTER.encode(date(2014, 4, 8)) == ['2014-04-08']
+    assert ISO_DATETIME_CONVERTER.decode(['2014-04-08T13:05:02']) == (
+        datetime(2014, 4, 8, 13, 5, 2))
+    assert ISO_DATETIME_CONVERTER.encode(datetime(2014, 4, 8, 13, 5, 2)) == [
+        '2014-04-08T13:05:02']
+    assert ISO_TIME_CONVERTER.decode(['13:05:02']) == time(13, 5, 2)
+    assert ISO_TIME_CONVERTER.encode(time(13, 5, 2)) == ['13:05:02']
+    with pytest.raises(ValueError):
+        ISO_DATE_CONVERTER.decode(['20140408'])
+    with pytest.raises(ValueError):
+        ISO_DATETIME_CONVERTER.decode(['2014-04-08 13:05:02'])
+    with pytest.raises(ValueError):
+        ISO_TIME_CONVERTER.decode(['130502'])
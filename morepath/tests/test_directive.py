@@ -8,6 +8,7 @@ from morepath.app import App
 from morepath.converter import Converter
 import morepath
 import reg
+from datetime import datetime
 
 import pytest
 from webtest import TestApp as Client
@@ -458,6 +459,166 @@ def test_root_link_with_parameters():
     assert response.body == '/?param=1'
 
 
+def test_link_memoize():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    @app.setting('link', 'memoize')
+    def get_memoize():
+        return True
+
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @app.path(model=Model, path='{id}')
+    def get_model(id):
+        return Model(id)
+
+    @app.view(model=Model)
+    def default(self, request):
+        first = request.link(self)
+        self.id = 'changed'
+        # memoized, so the change is not seen
+        second = request.link(self)
+        other = request.link(Model('other'))
+        edit = request.link(self, 'edit')
+        return ' '.join([first, second, other, edit])
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/foo')
+    assert response.body == '/foo /foo /other /changed/edit'
+
+
+def test_link_not_memoized_by_default():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @app.path(model=Model, path='{id}')
+    def get_model(id):
+        return Model(id)
+
+    @app.view(model=Model)
+    def default(self, request):
+        first = request.link(self)
+        self.id = 'changed'
+        second = request.link(self)
+        return ' '.join([first, second])
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/foo')
+    assert response.body == '/foo /changed'
+
+
+def test_link_many():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    class Model(object):
+        def __init__(self, id, param=0):
+            self.id = id
+            self.param = param
+
+    @app.path(model=Model, path='models/{id}')
+    def get_model(id, param=0):
+        return Model(id, param)
+
+    class Other(object):
+        pass
+
+    @app.path(model=Other, path='other')
+    def get_other():
+        return Other()
+
+    @app.view(model=Root)
+    def default(self, request):
+        objs = [Model('a'), None, Model('b', 1), Other(), Model('c')]
+        assert request.link_many(objs, 'edit', 'nothing') == [
+            request.link(obj, 'edit', 'nothing') for obj in objs]
+        return ' '.join(request.link_many(objs, default='-'))
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/')
+    assert response.body == ('/models/a?param=0 - /models/b?param=1 '
+                             '/other /models/c?param=0')
+
+
+def test_link_many_unknown_model():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    class Model(object):
+        pass
+
+    @app.view(model=Root)
+    def default(self, request):
+        try:
+            request.link_many([Model()])
+        except LinkError:
+            return "Link error"
+        return "No link error"
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/')
+    assert response.body == 'Link error'
+
+
+def test_link_many_custom_link():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @app.path(model=Model, path='models/{id}')
+    def get_model(id):
+        return Model(id)
+
+    @app.function(morepath.generic.link, morepath.Request, Model, object)
+    def custom_link(request, model, mounted):
+        return 'custom/' + model.id, {}
+
+    @app.view(model=Root)
+    def default(self, request):
+        return ' '.join(request.link_many([Model('a'), Model('b')]))
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/')
+    assert response.body == '/custom/a /custom/b'
+
+
 def test_implicit_variables():
     config = setup()
     app = morepath.App(testing_config=config)
@@ -612,6 +773,119 @@ def test_json_directive():
     assert response.body == '{"id": "foo"}'
 
 
+def test_json_directive_stream():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    @app.path(path='{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @app.json(model=Model, stream=True)
+    def json(self, request):
+        for i in range(3):
+            yield {'id': self.id, 'index': i}
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/foo')
+    assert response.json == [{'id': 'foo', 'index': i} for i in range(3)]
+    assert response.content_type == 'application/json'
+
+
+def test_view_etag():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    calls = []
+
+    @app.path(path='{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    def etag(self, request):
+        return 'v-%s' % self.id
+
+    @app.json(model=Model, etag=etag)
+    def json(self, request):
+        calls.append(self.id)
+        return {'id': self.id}
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/foo')
+    assert response.body == '{"id": "foo"}'
+    assert response.etag == 'v-foo'
+    assert calls == ['foo']
+
+    response = c.get('/foo', headers={'If-None-Match': '"v-foo"'},
+                     status=304)
+    assert response.body == ''
+    assert response.etag == 'v-foo'
+    assert calls == ['foo']
+
+    response = c.get('/foo', headers={'If-None-Match': '"v-bar"'})
+    assert response.body == '{"id": "foo"}'
+    assert calls == ['foo', 'foo']
+
+
+def test_view_last_modified():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    calls = []
+
+    modified = datetime(2014, 4, 8, 12, 0, 30, 500)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    def last_modified(self, request):
+        return modified
+
+    @app.view(model=Root, last_modified=last_modified)
+    def default(self, request):
+        calls.append(request.method)
+        return 'View'
+
+    @app.view(model=Root, request_method='POST',
+              last_modified=last_modified)
+    def post(self, request):
+        calls.append(request.method)
+        return 'Post'
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/')
+    assert response.body == 'View'
+    since = response.headers['Last-Modified']
+    assert since == 'Tue, 08 Apr 2014 12:00:30 GMT'
+
+    c.get('/', headers={'If-Modified-Since': since}, status=304)
+    assert calls == ['GET']
+
+    response = c.get('/', headers={
+        'If-Modified-Since': 'Tue, 08 Apr 2014 12:00:29 GMT'})
+    assert response.body == 'View'
+    # If-None-Match takes precedence, and there is no ETag
+    response = c.get('/', headers={'If-Modified-Since': since,
+                                   'If-None-Match': '"foo"'})
+    assert response.body == 'View'
+    # only GET and HEAD can be not modified
+    response = c.post('/', headers={'If-Modified-Since': since})
+    assert response.body == 'Post'
+    assert calls == ['GET', 'GET', 'GET', 'POST']
+
+
 def test_redirect():
     config = setup()
     app = morepath.App(testing_config=config)
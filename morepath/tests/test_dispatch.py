@@ -0,0 +1,101 @@
+import morepath
+from morepath import setup
+from morepath.dispatch import DispatchCache, NOT_FOUND, UNCACHEABLE
+from reg import ClassRegistry, Lookup, CachingClassLookup, Matcher
+from webtest import TestApp as Client
+import reg
+
+
+@reg.generic
+def target(obj):
+    return 'fallback'
+
+
+class Alpha(object):
+    pass
+
+
+class Beta(object):
+    pass
+
+
+def get_lookup(registry):
+    return Lookup(CachingClassLookup(registry))
+
+
+def test_dispatch_cache_call():
+    registry = ClassRegistry()
+    calls = []
+
+    def alpha_target(obj, lookup):
+        calls.append(lookup)
+        return 'alpha'
+    registry.register(target, [Alpha], alpha_target)
+    lookup = get_lookup(registry)
+    cache = DispatchCache()
+    assert cache.call(target, lookup, Alpha()) == 'alpha'
+    assert cache.call(target, lookup, Alpha()) == 'alpha'
+    assert calls == [lookup, lookup]
+    assert len(cache) == 1
+    assert cache.component(target, lookup, (Alpha,)) is alpha_target
+
+
+def test_dispatch_cache_not_found():
+    lookup = get_lookup(ClassRegistry())
+    cache = DispatchCache()
+    assert cache.call(target, lookup, Beta()) == 'fallback'
+    assert cache.call(target, lookup, Beta(), default='default') == 'default'
+    assert cache.component(target, lookup, (Beta,)) is NOT_FOUND
+
+
+def test_dispatch_cache_none_result_default():
+    registry = ClassRegistry()
+    registry.register(target, [Alpha], lambda obj: None)
+    lookup = get_lookup(registry)
+    cache = DispatchCache()
+    assert cache.call(target, lookup, Alpha()) is None
+    assert cache.call(target, lookup, Alpha(), default='default') == 'default'
+
+
+def test_dispatch_cache_matcher_uncacheable():
+    class AlphaMatcher(Matcher):
+        def __call__(self, obj):
+            return lambda obj: obj.value
+
+    registry = ClassRegistry()
+    registry.register(target, [Alpha], AlphaMatcher())
+    lookup = get_lookup(registry)
+    cache = DispatchCache()
+    first = Alpha()
+    first.value = 'first'
+    second = Alpha()
+    second.value = 'second'
+    assert cache.call(target, lookup, first) == 'first'
+    assert cache.call(target, lookup, second) == 'second'
+    assert cache.component(target, lookup, (Alpha,)) is UNCACHEABLE
+
+
+def test_app_dispatch_cache():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    @app.path(path='foo')
+    class Foo(object):
+        pass
+
+    @app.view(model=Foo)
+    def foo_default(self, request):
+        return 'foo'
+
+    config.commit()
+
+    c = Client(app)
+    response = c.get('/foo')
+    assert response.body == 'foo'
+    assert len(app.dispatch_cache) > 0
+    size = len(app.dispatch_cache)
+    response = c.get('/foo')
+    assert len(app.dispatch_cache) == size
+
+    config.commit()
+    assert len(app.dispatch_cache) == 0
@@ -0,0 +1,168 @@
+import morepath
+from morepath.encoder import (get_json_encoder, json_backend,
+                              JSON_BACKENDS, AUTO_BACKENDS)
+from morepath.error import ConfigError
+from collections import namedtuple
+from decimal import Decimal
+import pytest
+from webtest import TestApp as Client
+
+
+def setup_module(module):
+    morepath.disable_implicit()
+
+
+def test_stdlib_encoder():
+    encode = get_json_encoder('json')
+    assert encode({'a': [1, 2]}) == '{"a": [1, 2]}'
+    encode = get_json_encoder('json', separators=(',', ':'), sort_keys=True)
+    assert encode({'b': 1, 'a': 2}) == '{"a":2,"b":1}'
+
+
+def test_auto_encoder():
+    # whatever backend is used, it supports the options
+    encode = get_json_encoder(default=lambda obj: 'x')
+    assert encode([object()]) == '["x"]'
+
+
+def test_simplejson_encoder():
+    pytest.importorskip('simplejson')
+    encode = get_json_encoder('simplejson')
+    stdlib_encode = get_json_encoder('json')
+    Point = namedtuple('Point', ['x', 'y'])
+    payload = {'a': [1.1, u'\xe9', Point(1, 2)]}
+    assert encode(payload) == stdlib_encode(payload)
+    with pytest.raises(TypeError):
+        encode(Decimal('1.5'))
+    encode = get_json_encoder('simplejson', default=str)
+    assert encode(Decimal('1.5')) == '"1.5"'
+
+
+def test_ujson_encoder():
+    pytest.importorskip('ujson')
+    with pytest.raises(ConfigError):
+        get_json_encoder('ujson')
+    encode = get_json_encoder('ujson', separators=(',', ':'))
+    assert encode({'a': [1, 2]}) == '{"a":[1,2]}'
+
+
+def test_auto_encoder_same_output():
+    # auto only picks backends that give the same output as the
+    # standard library
+    assert 'ujson' not in AUTO_BACKENDS
+    payload = {'a': [1.1, u'\xe9', 'http://example.com/a']}
+    for separators in [None, (',', ':')]:
+        encode = get_json_encoder(separators=separators)
+        stdlib_encode = get_json_encoder('json', separators=separators)
+        assert encode(payload) == stdlib_encode(payload)
+
+
+def test_unknown_backend():
+    with pytest.raises(ConfigError):
+        get_json_encoder('unknown')
+
+
+def test_unavailable_backend(monkeypatch):
+    monkeypatch.setitem(JSON_BACKENDS, 'missing', lambda **options: None)
+    with pytest.raises(ConfigError):
+        get_json_encoder('missing')
+
+
+def test_json_backend(monkeypatch):
+    monkeypatch.setattr(morepath.encoder, 'JSON_BACKENDS',
+                        JSON_BACKENDS.copy())
+
+    @json_backend('upper')
+    def upper_encoder(**options):
+        encode = get_json_encoder('json', **options)
+        return lambda obj: encode(obj).upper()
+
+    assert get_json_encoder('upper')('a') == '"A"'
+
+
+def test_json_settings():
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+
+    @app.setting('json', 'backend')
+    def get_backend():
+        return 'json'
+
+    @app.setting('json', 'separators')
+    def get_separators():
+        return (',', ':')
+
+    @app.setting('json', 'sort_keys')
+    def get_sort_keys():
+        return True
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.json(model=Root)
+    def default(self, request):
+        return {'b': 1, 'a': 2}
+
+    @app.view(model=Root, name='view', render=morepath.render_json)
+    def view(self, request):
+        return {'b': 1, 'a': 2}
+
+    @app.json(model=Root, name='stream', stream=True)
+    def stream(self, request):
+        return [{'b': 1}, {'a': 2}]
+
+    config.commit()
+
+    c = Client(app)
+
+    assert c.get('/').body == '{"a":2,"b":1}'
+    assert c.get('/view').body == '{"a":2,"b":1}'
+    assert c.get('/stream').body == '[{"b":1},{"a":2}]'
+    # calling render_json directly uses the defaults
+    assert morepath.render_json({'b': 1}).body == '{"b": 1}'
+
+
+def test_json_settings_not_ensure_ascii():
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+
+    @app.setting('json', 'ensure_ascii')
+    def get_ensure_ascii():
+        return False
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.json(model=Root)
+    def default(self, request):
+        return {'a': u'\xe9'}
+
+    @app.json(model=Root, name='stream', stream=True)
+    def stream(self, request):
+        return [{'a': u'\xe9'}]
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/')
+    assert response.body == '{"a": "\xc3\xa9"}'
+    assert response.json == {'a': u'\xe9'}
+    assert response.content_length == len(response.body)
+    response = c.get('/stream')
+    assert response.body == '[{"a": "\xc3\xa9"}]'
+    assert response.json == [{'a': u'\xe9'}]
+
+
+def test_json_settings_unknown_backend():
+    config = morepath.setup()
+    app = morepath.App(testing_config=config)
+
+    @app.setting('json', 'backend')
+    def get_backend():
+        return 'unknown'
+
+    with pytest.raises(ConfigError):
+        config.commit()
@@ -1,5 +1,5 @@
 import urllib
-from morepath.path import register_path, get_arguments
+from morepath.path import register_path, get_arguments, FactoryCaller
 from morepath.converter import Converter, IDENTITY_CONVERTER, ConverterRegistry
 from morepath.app import App
 from morepath import setup
@@ -169,3 +169,31 @@ def test_argument_and_explicit_converters_from_type():
 
     assert reg.argument_and_explicit_converters({'a': None}, {'a': int}) == {
         'a': Converter(int)}
+
+
+def test_factory_caller():
+    def factory(a, b=2):
+        return a, b
+
+    caller = FactoryCaller(factory)
+    assert caller.names == ('a', 'b')
+    assert caller({'a': 1, 'b': 3, 'c': 4}) == (1, 3)
+    assert caller({'a': 1}) == (1, 2)
+
+
+def test_factory_caller_keywords():
+    def factory(a, **kw):
+        return a, kw
+
+    caller = FactoryCaller(factory)
+    assert caller({'a': 1, 'b': 2}) == (1, {'b': 2})
+
+
+def test_factory_caller_class():
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    caller = FactoryCaller(Model)
+    assert caller.names == ('id',)
+    assert caller({'id': 'a', 'request': None}).id == 'a'
@@ -1,7 +1,10 @@
+import gc
+import weakref
 import morepath
 from morepath import setup
 from morepath.error import LinkError, ConflictError
 from webtest import TestApp as Client
+from webob import Request
 import pytest
 
 
@@ -275,6 +278,169 @@ def test_mount_child_link():
     assert response.body == '/foo/models/one'
 
 
+def test_mount_child_linkmaker_cached():
+    config = setup()
+    app = morepath.App('app', testing_config=config)
+    mounted = morepath.App('mounted', variables=['mount_id'],
+                           testing_config=config)
+
+    @mounted.path(path='models/{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.view(model=Root)
+    def app_root_default(self, request):
+        assert request.linkmaker is request.linkmaker
+        child = request.child(mounted, id='foo')
+        assert request.child(mounted, id='foo') is child
+        assert request.child(mounted, id='bar') is not child
+        # unhashable variables are not cached
+        assert (request.child(mounted, id=['foo']) is not
+                request.child(mounted, id=['foo']))
+        return child.link(Model('one'))
+
+    @app.mount(path='{id}', app=mounted)
+    def get_context(id):
+        return {
+            'mount_id': id
+            }
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/')
+    assert response.body == '/foo/models/one'
+
+
+def test_linkmaker_no_reference_cycle():
+    config = setup()
+    app = morepath.App('app', testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    requests = []
+
+    @app.view(model=Root)
+    def default(self, request):
+        requests.append(weakref.ref(request))
+        return request.link(self)
+
+    config.commit()
+
+    environ = Request.blank('/').environ
+    gc.collect()
+    gc.disable()
+    try:
+        app(environ, lambda status, headers: None)
+        # freed by reference counting alone
+        assert requests[0]() is None
+    finally:
+        gc.enable()
+
+
+def test_mount_link_many():
+    config = setup()
+    app = morepath.App('app', testing_config=config)
+    mounted = morepath.App('mounted', variables=['mount_id'],
+                           testing_config=config)
+
+    @mounted.path(path='models/{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @mounted.path(path='')
+    class MountedRoot(object):
+        def __init__(self, mount_id):
+            self.mount_id = mount_id
+
+    @mounted.view(model=MountedRoot)
+    def root_default(self, request):
+        models = [Model('one'), Model('two')]
+        assert request.link_many(models) == [
+            request.link(model) for model in models]
+        return ' '.join(request.link_many(models, 'edit'))
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.view(model=Root)
+    def app_root_default(self, request):
+        return ' '.join(
+            request.child(mounted, id='foo').link_many([Model('one')]))
+
+    @app.mount(path='{id}', app=mounted)
+    def get_context(id):
+        return {
+            'mount_id': id
+            }
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/')
+    assert response.body == '/foo/models/one'
+
+    response = c.get('/bar')
+    assert response.body == '/bar/models/one/edit /bar/models/two/edit'
+
+
+def test_mount_prefix_nested():
+    config = setup()
+    app = morepath.App('app', testing_config=config)
+    mounted = morepath.App('mounted', variables=['mount_id'],
+                           testing_config=config)
+    nested = morepath.App('nested', variables=['nested_id'],
+                          testing_config=config)
+
+    @nested.path(path='models/{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @nested.path(path='')
+    class NestedRoot(object):
+        pass
+
+    @nested.view(model=NestedRoot)
+    def nested_root_default(self, request):
+        prefix = request.mounted.prefix
+        assert request.mounted.prefix is prefix
+        return request.link(Model('one'))
+
+    @mounted.mount(path='sub/{id}', app=nested)
+    def get_nested_context(id):
+        return {
+            'nested_id': id
+            }
+
+    @app.mount(path='{id}', app=mounted)
+    def get_context(id):
+        return {
+            'mount_id': id
+            }
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/foo/sub/bar')
+    assert response.body == '/foo/sub/bar/models/one'
+
+    mount = app.mounted().child(mounted, id='a').child(nested, id='b')
+    assert mount.prefix == ('a/sub/b', {})
+
+
 def test_mount_child_link_unknown_child():
     config = setup()
     app = morepath.App('app', testing_config=config)
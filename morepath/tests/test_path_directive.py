@@ -1,6 +1,7 @@
 import morepath
 from morepath import setup
 from morepath.converter import Converter
+from morepath.routes import routes
 from morepath.error import DirectiveReportError, ConfigError
 
 from webtest import TestApp as Client
@@ -631,6 +632,44 @@ def test_default_datetime_converter():
     response = c.get('/?d=broken', status=400)
 
 
+def test_default_time_converter():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    class Model(object):
+        def __init__(self, t):
+            self.t = t
+
+    from datetime import time
+
+    @app.path(model=Model, path='/')
+    def get_model(t=time(10, 30)):
+        return Model(t)
+
+    @app.view(model=Model)
+    def default(self, request):
+        return "View: %s" % self.t
+
+    @app.view(model=Model, name='link')
+    def link(self, request):
+        return request.link(self)
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/?t=144530')
+    assert response.body == "View: 14:45:30"
+
+    response = c.get('/')
+    assert response.body == "View: 10:30:00"
+
+    response = c.get('/link?t=144500')
+    assert response.body == '/?t=144500'
+
+    response = c.get('/?t=broken', status=400)
+
+
 def test_custom_date_converter():
     config = setup()
     app = morepath.App(testing_config=config)
@@ -683,6 +722,68 @@ def test_custom_date_converter():
     response = c.get('/?d=broken', status=400)
 
 
+def test_cached_converter():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    class Model(object):
+        def __init__(self, d):
+            self.d = d
+
+    from datetime import date
+
+    decoded = []
+
+    def date_decode(s):
+        decoded.append(s)
+        day, month, year = s.split('-')
+        return date(int(year), int(month), int(day))
+
+    def date_encode(d):
+        return d.strftime('%d-%m-%Y')
+
+    @app.converter(type=date, cache_size=10)
+    def date_converter():
+        return Converter(date_decode, date_encode)
+
+    @app.path(model=Model, path='/')
+    def get_model(d=date(2011, 1, 1)):
+        return Model(d)
+
+    @app.view(model=Model)
+    def default(self, request):
+        return "View: %s" % self.d
+
+    @app.view(model=Model, name='link')
+    def link(self, request):
+        return request.link(self)
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/?d=10-11-2012')
+    assert response.body == "View: 2012-11-10"
+    response = c.get('/?d=10-11-2012')
+    assert response.body == "View: 2012-11-10"
+    assert decoded == ['10-11-2012']
+
+    response = c.get('/link?d=10-11-2012')
+    assert response.body == '/?d=10-11-2012'
+    response = c.get('/link?d=10-11-2012')
+    assert response.body == '/?d=10-11-2012'
+
+    c.get('/?d=broken', status=400)
+    c.get('/?d=broken', status=400)
+
+    stats = app.converter_cache_stats()
+    assert stats.keys() == [date]
+    assert stats[date]['decode']['hits'] == 3
+    assert stats[date]['decode']['entries'] == 1
+    assert stats[date]['encode']['misses'] == 1
+    assert stats[date]['encode']['hits'] == 1
+
+
 def test_variable_path_parameter_required_no_default():
     config = setup()
     app = morepath.App(testing_config=config)
@@ -1112,3 +1213,159 @@ def test_extra_parameters_with_get_converters():
     assert response.body == "[(u'a', 1), (u'b', u'B')]"
     response = c.get('/link?a=1&b=B')
     assert response.body == '/?a=1&b=B'
+
+
+def test_path_negative_cache():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    called = []
+
+    @app.path(model=Model, path='models/{id}', negative_cache_size=10)
+    def get_model(id, filter=''):
+        called.append((id, filter))
+        if id == 'missing':
+            return None
+        return Model(id)
+
+    @app.view(model=Model)
+    def default(self, request):
+        return "View: %s" % self.id
+
+    config.commit()
+
+    c = Client(app)
+
+    c.get('/models/missing', status=404)
+    c.get('/models/missing', status=404)
+    assert called == [('missing', '')]
+    # the URL parameters are part of the key
+    c.get('/models/missing?filter=a', status=404)
+    c.get('/models/missing?filter=a', status=404)
+    assert called == [('missing', ''), ('missing', 'a')]
+    # models that are found are not cached
+    response = c.get('/models/found')
+    assert response.body == 'View: found'
+    response = c.get('/models/found')
+    assert len(called) == 4
+
+    model_factories = [
+        model_factory for path, route_app, model_factory in
+        routes(app)]
+    assert model_factories == [get_model]
+
+
+def test_path_negative_cache_disabled_by_default():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    called = []
+
+    @app.path(path='models/{id}')
+    class Model(object):
+        def __init__(self, id):
+            called.append(id)
+            self.id = id
+
+    config.commit()
+
+    c = Client(app)
+    c.get('/models/missing', status=404)
+    c.get('/models/missing', status=404)
+    assert called == ['missing', 'missing']
+
+
+def test_path_cache():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    class Country(object):
+        def __init__(self, code, lang):
+            self.code = code
+            self.lang = lang
+
+    called = []
+    existing = set(['nl', 'de'])
+
+    @app.path(model=Country, path='countries/{code}', cache_size=10,
+              negative_cache_size=10)
+    def get_country(code, lang='en'):
+        called.append((code, lang))
+        if code not in existing:
+            return None
+        return Country(code, lang)
+
+    @app.view(model=Country)
+    def default(self, request):
+        return "%s %s" % (self.code, self.lang)
+
+    config.commit()
+
+    c = Client(app)
+
+    assert c.get('/countries/nl').body == 'nl en'
+    assert c.get('/countries/nl').body == 'nl en'
+    assert c.get('/countries/nl?lang=nl').body == 'nl nl'
+    assert c.get('/countries/nl?lang=nl').body == 'nl nl'
+    assert called == [('nl', 'en'), ('nl', 'nl')]
+
+    app.invalidate_model(Country, code='nl')
+    assert c.get('/countries/nl').body == 'nl en'
+    assert c.get('/countries/nl?lang=nl').body == 'nl nl'
+    assert called == [('nl', 'en'), ('nl', 'nl'), ('nl', 'en')]
+
+    c.get('/countries/be', status=404)
+    existing.add('be')
+    c.get('/countries/be', status=404)
+    app.invalidate_model(Country, code='be')
+    assert c.get('/countries/be').body == 'be en'
+
+    app.clear_model_cache()
+    del called[:]
+    assert c.get('/countries/de').body == 'de en'
+    assert c.get('/countries/nl').body == 'nl en'
+    assert called == [('de', 'en'), ('nl', 'en')]
+    app.clear_model_cache(Country)
+    assert c.get('/countries/nl').body == 'nl en'
+    assert len(called) == 3
+
+    # models that are not cached can be invalidated too
+    app.invalidate_model(object, id='foo')
+    app.clear_model_cache(object)
+
+
+def test_path_cache_request_not_allowed():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    # the request would be part of the key, so the cache never hits
+    @app.path(model=Model, path='models/{id}', cache_size=10)
+    def get_model(request, id):
+        return Model(id)
+
+    with pytest.raises(DirectiveReportError):
+        config.commit()
+
+
+def test_path_negative_cache_parent_not_allowed():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @app.path(model=Model, path='models/{id}', negative_cache_size=10)
+    def get_model(parent, id):
+        return Model(id)
+
+    with pytest.raises(DirectiveReportError):
+        config.commit()
@@ -1,5 +1,9 @@
 from morepath.app import App
 from morepath import setup
+from morepath.view import ViewMatcher, register_view
+from reg import PredicateMatcher, Predicate, KeyIndex, ANY
+import itertools
+import random
 
 from webtest import TestApp as Client
 import morepath
@@ -63,3 +67,163 @@ def test_extra_predicates():
     assert response.body == 'a'
     response = c.get('/b/foo')
     assert response.body == 'b'
+
+
+def test_view_matcher_same_as_predicate_matcher():
+    predicates = [Predicate(name, KeyIndex, default='a')
+                  for name in ['x', 'y', 'z']]
+    keys = list(itertools.product(['a', 'b', ANY], repeat=3))
+    queries = list(itertools.product(['a', 'b', 'c'], repeat=3))
+    rand = random.Random(0)
+    for i in range(20):
+        matcher = ViewMatcher(predicates)
+        reg_matcher = PredicateMatcher(predicates)
+        for key in rand.sample(keys, rand.randint(1, len(keys))):
+            key = dict(zip(['x', 'y', 'z'], key))
+            matcher.register(key, key)
+            reg_matcher.register(key, key)
+        for query in queries:
+            query = dict(zip(['x', 'y', 'z'], query))
+            assert matcher(**query) == reg_matcher(**query)
+        # missing predicates get their default
+        assert matcher(x='b') == reg_matcher(x='b')
+
+
+def test_view_matcher_skip():
+    predicates = [Predicate(name, KeyIndex, calc=lambda n=name: n,
+                            default='')
+                  for name in ['x', 'y']]
+    matcher = ViewMatcher(predicates)
+    matcher.register({'x': 'x', 'y': ANY}, 'X')
+    matcher.register({'x': ANY, 'y': ANY}, 'any')
+    matcher.compile(skip=['y'])
+    assert matcher.predicates() == {'x': 'x'}
+    assert matcher(x='x') == 'X'
+    assert matcher(x='z') == 'any'
+
+
+def test_any_predicate_not_calculated():
+    config = setup()
+    app = App(testing_config=config)
+
+    calculated = []
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    class Sub(Root):
+        pass
+
+    @app.path(model=Sub, path='sub')
+    def get_sub():
+        return Sub()
+
+    @app.predicate(name='secure', order=2, default=ANY)
+    def get_secure(self, request):
+        calculated.append(self)
+        return request.scheme == 'https'
+
+    @app.view(model=Root)
+    def default(self, request):
+        return 'default'
+
+    @app.view(model=Sub, name='sub')
+    def sub(self, request):
+        return 'sub'
+
+    config.commit()
+
+    c = Client(app)
+
+    assert c.get('/').body == 'default'
+    # the view of the base class is found with the predicates of Sub
+    assert c.get('/sub').body == 'default'
+    assert c.get('/sub/sub').body == 'sub'
+    assert calculated == []
+
+
+def test_view_registered_after_commit():
+    config = setup()
+    app = App(testing_config=config)
+
+    calculated = []
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    class Sub(Root):
+        pass
+
+    @app.path(model=Sub, path='sub')
+    def get_sub():
+        return Sub()
+
+    @app.predicate(name='secure', order=2, default=ANY)
+    def get_secure(self, request):
+        calculated.append(self)
+        return request.scheme == 'https'
+
+    @app.view(model=Root)
+    def default(self, request):
+        return 'default'
+
+    config.commit()
+
+    def late(self, request):
+        return 'late'
+
+    def late_secure(self, request):
+        return 'late secure'
+
+    register_view(app, Root, late, predicates={'name': 'late'})
+
+    c = Client(app)
+
+    assert c.get('/late').body == 'late'
+    assert c.get('/sub/late').body == 'late'
+    # the matcher is recompiled with the predicates skipped for the app
+    assert calculated == []
+
+    # unless the view uses one of them
+    register_view(app, Root, late_secure,
+                  predicates={'name': 'late', 'secure': True})
+    assert c.get('https://localhost/late').body == 'late secure'
+    assert c.get('/late').body == 'late'
+
+
+def test_any_predicate_calculated_when_used():
+    config = setup()
+    app = App(testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    class Sub(Root):
+        pass
+
+    @app.path(model=Sub, path='sub')
+    def get_sub():
+        return Sub()
+
+    @app.predicate(name='secure', order=2, default=ANY)
+    def get_secure(self, request):
+        return request.scheme == 'https'
+
+    @app.view(model=Root, secure=True)
+    def secure(self, request):
+        return 'secure'
+
+    @app.view(model=Sub)
+    def default(self, request):
+        return 'default'
+
+    config.commit()
+
+    c = Client(app)
+
+    assert c.get('/sub').body == 'default'
+    assert c.get('https://localhost/').body == 'secure'
+    c.get('/', status=404)
@@ -3,9 +3,13 @@ from morepath.app import App
 from morepath.publish import publish, resolve_response
 from morepath.path import register_path
 from morepath.request import Response
-from morepath.view import register_view, render_json, render_html
+from morepath.view import (register_view, render_json, render_html,
+                           render_json_stream, iter_json_chunks,
+                           has_view_name)
+from morepath import view as view_module
 from morepath.core import setup
 from webob.exc import HTTPNotFound, HTTPBadRequest
+from webtest import TestApp as Client
 import webob
 
 import pytest
@@ -167,6 +171,37 @@ def test_render_html():
     assert response.content_type == 'text/html'
 
 
+def test_render_json_stream():
+    def items():
+        for i in range(3):
+            yield {'id': i}
+
+    response = render_json_stream(items())
+    assert response.body == '[{"id": 0}, {"id": 1}, {"id": 2}]'
+    assert response.content_type == 'application/json'
+    assert response.content_length == len(response.body)
+
+    assert render_json_stream([]).body == '[]'
+    # not an array, so rendered as usual
+    assert render_json_stream({'a': 1}).body == '{"a": 1}'
+    assert render_json_stream('a').body == '"a"'
+
+
+def test_render_json_stream_chunks(monkeypatch):
+    monkeypatch.setattr(view_module, 'JSON_CHUNK_SIZE', 10)
+    response = render_json_stream(iter(range(20)))
+    assert response.content_length is None
+    chunks = list(response.app_iter)
+    assert chunks == list(iter_json_chunks(range(20), str, 10))
+    assert ''.join(chunks) == render_json(range(20)).body
+
+
+def test_iter_json_chunks():
+    chunks = list(iter_json_chunks(range(10), str, 8))
+    assert chunks == ['[0, 1, 2', ', 3, 4, 5', ', 6, 7, 8', ', 9]']
+    assert list(iter_json_chunks([], str, 8)) == ['[]']
+
+
 def test_view_raises_http_error():
     config = setup()
     app = App(testing_config=config)
@@ -242,3 +277,82 @@ def test_view_after_non_decorator():
     result = resolve_response(app.request(get_environ(path='')), model)
     assert result.body == 'View!'
     assert result.headers.get('Foo') == 'FOO'
+
+
+def test_has_view_name():
+    config = setup()
+    app = App(testing_config=config)
+    config.commit()
+
+    class SubModel(Model):
+        pass
+
+    class Other(object):
+        pass
+
+    def view(self, request):
+        return "view"
+
+    register_view(app, Model, view, predicates=dict(name='a'))
+    register_view(app, SubModel, view, predicates=dict(name='b'))
+    register_view(app, Other, view)
+
+    assert has_view_name(app.lookup, Model(), 'a')
+    assert not has_view_name(app.lookup, Model(), 'b')
+    assert has_view_name(app.lookup, SubModel(), 'a')
+    assert has_view_name(app.lookup, SubModel(), 'b')
+    assert not has_view_name(app.lookup, SubModel(), 'c')
+    # registered without predicates, so any name may match
+    assert has_view_name(app.lookup, Other(), 'c')
+    assert not has_view_name(app.lookup, object(), '')
+
+
+def test_unknown_view_name_skips_predicates():
+    config = setup()
+    app = App(testing_config=config)
+    calculated = []
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.predicate(name='extra', order=2, default='')
+    def extra_predicate(self, request):
+        calculated.append(request.view_name)
+        return ''
+
+    @app.view(model=Root, name='edit')
+    def edit(self, request):
+        return "edit"
+
+    config.commit()
+
+    c = Client(app)
+    c.get('/+unknown', status=404)
+    assert calculated == []
+    response = c.get('/+edit')
+    assert response.body == 'edit'
+    assert calculated == ['edit']
+
+
+def test_unknown_view_name_with_name_fallback():
+    config = setup()
+    app = App(testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.view(model=Root)
+    def default(self, request):
+        return "default"
+
+    @app.predicate_fallback(name='name')
+    def name_fallback(self, request):
+        return "fallback %s" % request.view_name
+
+    config.commit()
+
+    c = Client(app)
+    response = c.get('/+unknown')
+    assert response.body == 'fallback unknown'
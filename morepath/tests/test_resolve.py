@@ -173,3 +173,49 @@ def traverse_attributes(container, name):
     if name.startswith(VIEW_PREFIX):
         return None
     return getattr(container, name, None)
+
+
+def test_request_segments():
+    request = get_request(path='/a/b/c', lookup=None)
+    segments, pos = request.get_segments()
+    assert segments == ['a', 'b', 'c']
+    assert pos == 0
+    assert request.has_unconsumed()
+    request.set_consumed(2)
+    assert request.get_segments() == (['a', 'b', 'c'], 2)
+    assert request.unconsumed == ['c']
+    request.set_consumed(3)
+    # unconsumed was accessed before, so it is still leading
+    assert request.unconsumed == ['c']
+    assert request.has_unconsumed()
+
+
+def test_request_unconsumed_modified():
+    request = get_request(path='/a/b/c', lookup=None)
+    assert request.unconsumed == ['c', 'b', 'a']
+    request.unconsumed.pop()
+    assert request.get_segments() == (['b', 'c'], 0)
+    request.unconsumed = []
+    assert not request.has_unconsumed()
+    assert request.get_segments() == ([], 0)
+
+
+def test_request_no_segments():
+    request = get_request(path='/', lookup=None)
+    assert request.get_segments() == ([], 0)
+    assert not request.has_unconsumed()
+    assert request.unconsumed == []
+
+
+def test_request_lazy():
+    request = get_request(path='/a/b', lookup=None)
+    assert '_segments' not in request.__dict__
+    assert '_after' not in request.__dict__
+    assert request.has_unconsumed()
+    assert request.__dict__['_segments'] == ['a', 'b']
+
+    @request.after
+    def after(response):
+        pass
+    assert request._after == [after]
+    assert get_request(path='/', lookup=None)._after == ()
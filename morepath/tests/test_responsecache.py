@@ -0,0 +1,323 @@
+import os
+import morepath
+from morepath import setup
+from morepath.responsecache import (ResponseCache, MemoryStorage,
+                                    FileStorage)
+from webtest import TestApp as Client
+
+
+def setup_module(module):
+    morepath.disable_implicit()
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_memory_storage():
+    storage = MemoryStorage(size=2)
+    storage.put(('/a', ''), 'A')
+    storage.put(('/a', 'edit'), 'A edit')
+    assert storage.get(('/a', '')) == 'A'
+    storage.put(('/b', ''), 'B')
+    # least recently used is evicted
+    assert storage.get(('/a', 'edit')) is None
+    assert storage.get(('/b', '')) == 'B'
+    storage.invalidate('/a')
+    assert storage.get(('/a', '')) is None
+    assert storage.get(('/b', '')) == 'B'
+    storage.clear()
+    assert storage.get(('/b', '')) is None
+
+
+def test_memory_storage_ttl():
+    clock = Clock()
+    storage = MemoryStorage(ttl=10, clock=clock)
+    storage.put(('/a', ''), 'A')
+    clock.now = 9
+    assert storage.get(('/a', '')) == 'A'
+    clock.now = 10
+    assert storage.get(('/a', '')) is None
+
+
+def test_file_storage(tmpdir):
+    directory = str(tmpdir.join('cache'))
+    storage = FileStorage(directory)
+    storage.put(('/a', ''), 'A')
+    storage.put(('/a', 'edit'), 'A edit')
+    storage.put(('/b', ''), 'B')
+    # another process can read them
+    other = FileStorage(directory)
+    assert other.get(('/a', '')) == 'A'
+    assert other.get(('/c', '')) is None
+    other.invalidate('/a')
+    assert storage.get(('/a', '')) is None
+    assert storage.get(('/a', 'edit')) is None
+    assert storage.get(('/b', '')) == 'B'
+    storage.clear()
+    assert os.listdir(directory) == []
+
+
+def test_file_storage_non_ascii_url(tmpdir):
+    storage = FileStorage(str(tmpdir))
+    storage.put((u'/caf\xe9', ''), 'Caf\xc3\xa9')
+    assert storage.get((u'/caf\xe9', '')) == 'Caf\xc3\xa9'
+    storage.invalidate(u'/caf\xe9')
+    assert storage.get((u'/caf\xe9', '')) is None
+
+
+def test_file_storage_ttl(tmpdir):
+    clock = Clock()
+    storage = FileStorage(str(tmpdir), ttl=10, clock=clock)
+    storage.put(('/a', ''), 'A')
+    clock.now = 9
+    assert storage.get(('/a', '')) == 'A'
+    clock.now = 10
+    assert storage.get(('/a', '')) is None
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_file_storage_corrupt_file(tmpdir):
+    storage = FileStorage(str(tmpdir))
+    storage.put(('/a', ''), 'A')
+    path = storage.path(('/a', ''))
+    with open(path, 'wb') as f:
+        f.write('garbage')
+    assert storage.get(('/a', '')) is None
+    assert not os.path.exists(path)
+    # a pickle that refers to code that no longer exists
+    with open(path, 'wb') as f:
+        f.write('cno_such_module\nThing\n.')
+    assert storage.get(('/a', '')) is None
+    assert not os.path.exists(path)
+
+
+def test_file_storage_evicts_least_recently_used(tmpdir):
+    storage = FileStorage(str(tmpdir), size=2)
+    storage.put(('/a', ''), 'A')
+    storage.put(('/b', ''), 'B')
+    os.utime(storage.path(('/a', '')), (100, 100))
+    os.utime(storage.path(('/b', '')), (200, 200))
+    storage.put(('/c', ''), 'C')
+    assert storage.get(('/a', '')) is None
+    assert storage.get(('/b', '')) == 'B'
+    assert storage.get(('/c', '')) == 'C'
+
+
+def test_view_cache():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    cache = ResponseCache(headers=['Accept-Language'])
+    calls = []
+
+    @app.path(path='{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @app.json(model=Model, cache=cache)
+    def default(self, request):
+        calls.append((self.id, request.headers.get('Accept-Language')))
+        return {'id': self.id}
+
+    @app.view(model=Model, request_method='POST')
+    def post(self, request):
+        cache.invalidate(request.link(self))
+        return 'changed'
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/a')
+    assert response.body == '{"id": "a"}'
+    assert response.content_type == 'application/json'
+    response = c.get('/a')
+    assert response.body == '{"id": "a"}'
+    assert response.content_type == 'application/json'
+    assert calls == [('a', None)]
+
+    c.get('/b')
+    c.get('/a', headers={'Accept-Language': 'nl'})
+    c.get('/a?x=1')
+    assert calls == [('a', None), ('b', None), ('a', 'nl'), ('a', None)]
+
+    c.post('/a')
+    c.get('/a')
+    c.get('/b')
+    assert calls == [('a', None), ('b', None), ('a', 'nl'), ('a', None),
+                     ('a', None)]
+
+
+def test_view_cache_not_cached():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    cache = ResponseCache()
+    calls = []
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.view(model=Root, cache=cache)
+    def default(self, request):
+        calls.append('default')
+
+        @request.after
+        def set_cookie(response):
+            response.set_cookie('session', 'secret')
+        return 'Default'
+
+    @app.view(model=Root, name='missing', cache=cache)
+    def missing(self, request):
+        calls.append('missing')
+        return morepath.Response('Missing', status=404)
+
+    config.commit()
+
+    c = Client(app)
+
+    c.get('/')
+    c.get('/')
+    c.get('/missing', status=404)
+    c.get('/missing', status=404)
+    assert calls == ['default', 'default', 'missing', 'missing']
+
+
+def test_view_cache_after_permission():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    cache = ResponseCache()
+
+    class Permission(object):
+        pass
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    @app.permission(model=Root, permission=Permission)
+    def get_permission(identity, model, permission):
+        return False
+
+    @app.view(model=Root, permission=Permission, cache=cache)
+    def default(self, request):
+        return 'Secret'
+
+    config.commit()
+
+    # a response in the cache is not served without permission
+    cache.put(('http://localhost/', repr(app), '', '', (), None),
+              morepath.Response('Secret'))
+
+    c = Client(app)
+
+    c.get('/', status=401)
+
+
+def test_view_cache_file_storage_non_ascii_path(tmpdir):
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    cache = ResponseCache(storage=FileStorage(str(tmpdir)))
+    calls = []
+
+    @app.path(path='{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @app.json(model=Model, cache=cache)
+    def default(self, request):
+        calls.append(self.id)
+        return {'id': self.id}
+
+    @app.view(model=Model, request_method='POST')
+    def post(self, request):
+        cache.invalidate(request.link(self))
+        return 'changed'
+
+    config.commit()
+
+    c = Client(app)
+
+    assert c.get('/caf%C3%A9').json == {'id': u'caf\xe9'}
+    assert c.get('/caf%C3%A9').json == {'id': u'caf\xe9'}
+    assert len(calls) == 1
+    c.post('/caf%C3%A9')
+    c.get('/caf%C3%A9')
+    assert len(calls) == 2
+
+
+def test_file_storage_evicts_every_few_puts(tmpdir):
+    storage = FileStorage(str(tmpdir), size=20)
+    for i in range(21):
+        storage.put(('/%s' % i, ''), i)
+    # the directory isn't listed on every put
+    assert len(storage.files()) == 21
+    storage.put(('/21', ''), 21)
+    assert len(storage.files()) == 20
+
+
+def test_view_cache_runs_after_of_request():
+    config = setup()
+    app = morepath.App(testing_config=config)
+
+    cache = ResponseCache()
+    calls = []
+
+    class Model(object):
+        pass
+
+    @app.path(model=Model, path='')
+    def get_model(request):
+        @request.after
+        def set_header(response):
+            response.headers['X-Request'] = request.headers['X-Request']
+        return Model()
+
+    @app.view(model=Model, cache=cache)
+    def default(self, request):
+        calls.append('default')
+        return 'Default'
+
+    config.commit()
+
+    c = Client(app)
+
+    response = c.get('/', headers={'X-Request': '1'})
+    assert response.headers['X-Request'] == '1'
+    response = c.get('/', headers={'X-Request': '2'})
+    assert response.body == 'Default'
+    assert response.headers.getall('X-Request') == ['2']
+    assert calls == ['default']
+
+
+def test_view_cache_extending_apps():
+    config = setup()
+    base = morepath.App(testing_config=config)
+    one = morepath.App('one', extends=[base], testing_config=config)
+    two = morepath.App('two', extends=[base], testing_config=config)
+
+    cache = ResponseCache()
+
+    @base.path(path='')
+    class Root(object):
+        pass
+
+    @base.view(model=Root, cache=cache)
+    def default(self, request):
+        return request.mounts[-1].app.name
+
+    config.commit()
+
+    assert Client(one).get('/').body == 'one'
+    assert Client(two).get('/').body == 'two'
+    assert Client(one).get('/').body == 'one'
@@ -0,0 +1,55 @@
+import morepath
+from morepath import setup
+from morepath.routes import routes, format_routes, resolve
+import pytest
+
+
+def test_routes():
+    config = setup()
+    app = morepath.App('app', testing_config=config)
+    mounted = morepath.App('mounted', variables=['mount_id'],
+                           testing_config=config)
+
+    @app.path(path='')
+    class Root(object):
+        pass
+
+    class Document(object):
+        pass
+
+    @app.path(path='documents/{id}', model=Document)
+    def get_document(id):
+        return Document()
+
+    @mounted.path(path='models/{id}')
+    class Model(object):
+        def __init__(self, id):
+            self.id = id
+
+    @app.mount(path='sub/{id}', app=mounted)
+    def get_context(id):
+        return {
+            'mount_id': id
+            }
+
+    config.commit()
+
+    result = [(path, route_app, model_factory) for
+              path, route_app, model_factory in routes(app)]
+    assert result == [
+        ('/', app, Root),
+        ('/documents/{id}', app, get_document),
+        ('/sub/{id}', app, app._mounted[mounted]),
+        ('/sub/{id}/models/{id}', mounted, Model)]
+
+    lines = format_routes(app)
+    assert lines[0] == "/  <morepath.App 'app'>  %s.Root" % __name__
+    assert lines[-1] == (
+        "/sub/{id}/models/{id}  <morepath.App 'mounted'>  %s.Model" %
+        __name__)
+
+
+def test_resolve():
+    assert resolve('morepath.routes:routes') is routes
+    with pytest.raises(ValueError):
+        resolve('morepath.routes')
@@ -1,8 +1,9 @@
 import morepath
-from morepath.traject import (Traject, Node, Step, TrajectError,
+from morepath.traject import (Traject, Node, Step, TrajectError, Inverse,
                               is_identifier, parse_variables,
-                              Path, parse_path, create_path)
-from morepath.converter import ParameterFactory
+                              Path, parse_path, parse_segments,
+                              create_path)
+from morepath.converter import ParameterFactory, parse_query
 from morepath import generic
 from morepath.app import App
 from morepath.request import Request
@@ -252,6 +253,44 @@ def test_variable_node_optional_colon():
     assert node.get('a:b') == (xy_node, {'x': 'a', 'y': 'b'})
 
 
+def test_variable_node_combined_same_as_linear():
+    node = Node()
+    node.add(Step('{id}.json'))
+    node.add(Step('page-{n}'))
+    node.add(Step('{slug}'))
+    node.add(Step('{a}x{b}'))
+    node.add(Step('prefix{x}postfix'))
+    for segment in ['foo.json', 'page-3', 'foo', 'axb', 'prefixApostfix',
+                    'page-x.json', '']:
+        assert node.get(segment) == node.linear_get(segment)
+
+
+def test_variable_node_combined_converter_fallback():
+    node = Node()
+    int_node = node.add(Step('a{x}', converters=dict(x=Converter(int))))
+    str_node = node.add(Step('{y}'))
+    assert node.get('a1') == (int_node, {'x': 1})
+    assert node.get('afoo') == (str_node, {'y': 'afoo'})
+    assert node.get('afoo') == node.linear_get('afoo')
+
+
+def test_variable_node_combined_many():
+    node = Node()
+    for i in range(200):
+        node.add(Step('p%s{x}s{y}' % i))
+    node.add(Step('{z}'))
+    for segment in ['p3asb', 'p199xsy', 'p1s', 'foo']:
+        assert node.get(segment) == node.linear_get(segment)
+
+
+def test_variable_node_combined_reset_on_add():
+    node = Node()
+    x_node = node.add(Step('{x}'))
+    assert node.get('prefixwhat') == (x_node, {'x': 'prefixwhat'})
+    prefix_node = node.add(Step('prefix{x}'))
+    assert node.get('prefixwhat') == (prefix_node, {'x': 'what'})
+
+
 def test_traject_simple():
     traject = Traject()
     traject.add_pattern('a/b/c', 'abc')
@@ -293,6 +332,272 @@ def test_traject_with_converter():
     assert traject.consume(['foo']) == (None, ['foo'], {})
 
 
+def test_traject_cache():
+    traject = Traject(cache_size=10)
+    traject.add_pattern('a/{x}/b', 'axb', dict(x=Converter(int)))
+    traject.add_pattern('b/{y}', 'by')
+    assert traject.consume(['b', '1', 'a']) == ('axb', [], {'x': 1})
+    assert traject.cache.misses == 1
+    assert traject.consume(['b', '1', 'a']) == ('axb', [], {'x': 1})
+    assert traject.cache.hits == 1
+    assert traject.consume(['c', 'foo', 'b']) == ('by', ['c'], {'y': 'foo'})
+    result = traject.consume(['c', 'foo', 'b'])
+    assert result == ('by', ['c'], {'y': 'foo'})
+    # the returned stack is not shared with the cache
+    result[1].append('d')
+    assert traject.consume(['c', 'foo', 'b']) == ('by', ['c'], {'y': 'foo'})
+    assert traject.cache.hits == 3
+
+
+def test_traject_cache_does_not_match_again(monkeypatch):
+    traject = Traject(cache_size=10)
+    traject.add_pattern('a/{x}-{y}', 'axy', dict(x=Converter(int)))
+    assert traject.consume(['1-b', 'a']) == ('axy', [], {'x': 1, 'y': 'b'})
+
+    def fail(self, s):
+        assert False, "step should not be matched on a cache hit"
+    monkeypatch.setattr(Step, 'match', fail)
+    assert traject.consume(['1-b', 'a']) == ('axy', [], {'x': 1, 'y': 'b'})
+    assert traject.cache.hits == 1
+
+
+def test_traject_cache_converts_each_time():
+    decoded = []
+
+    def decode(s):
+        decoded.append(s)
+        return int(s)
+    traject = Traject(cache_size=10)
+    traject.add_pattern('{x}', 'found', dict(x=Converter(decode)))
+    assert traject.consume(['1']) == ('found', [], {'x': 1})
+    assert traject.consume(['1']) == ('found', [], {'x': 1})
+    assert decoded == ['1', '1']
+
+
+def test_traject_cache_same_as_uncached():
+    stacks = [['y', 'prefixX', 'a'], ['z', 'prefixX', 'a'],
+              ['z', 'blah', 'a'], ['blah', 'a'], [], ['+view', 'a']]
+    traject = Traject(cache_size=10)
+    uncached = Traject()
+    for t in [traject, uncached]:
+        t.add_pattern('a/prefix{x}/y', 'prefix')
+        t.add_pattern('a/{x}/z', 'no_prefix')
+    for stack in stacks + stacks:
+        assert traject.consume(stack) == uncached.consume(stack)
+
+
+def test_traject_cache_eviction():
+    traject = Traject(cache_size=1)
+    traject.add_pattern('{x}', 'found')
+    traject.consume(['a'])
+    traject.consume(['b'])
+    assert traject.cache.evictions == 1
+    assert len(traject.cache) == 1
+
+
+def test_traject_cache_invalidated_by_add_pattern():
+    traject = Traject(cache_size=10)
+    traject.add_pattern('a', 'a')
+    assert traject.consume(['b', 'a']) == ('a', ['b'], {})
+    traject.add_pattern('a/b', 'ab')
+    assert len(traject.cache) == 0
+    assert traject.consume(['b', 'a']) == ('ab', [], {})
+
+
+def test_traject_cache_disabled_by_default():
+    traject = Traject()
+    assert traject.cache is None
+    traject.enable_cache(5)
+    assert traject.cache.size == 5
+    traject.enable_cache(0)
+    assert traject.cache is None
+
+
+def test_traject_cache_setting():
+    config = morepath.setup()
+    app = App(testing_config=config)
+
+    @app.setting('traject', 'cache_size')
+    def get_cache_size():
+        return 100
+
+    @app.path(path='foo')
+    class Foo(object):
+        pass
+
+    config.commit()
+    assert app.traject.cache.size == 100
+
+    config.commit()
+    assert app.traject.cache.size == 100
+    assert len(app.traject.cache) == 0
+
+
+def test_traject_cache_setting_default():
+    config = morepath.setup()
+    app = App(testing_config=config)
+    config.commit()
+    assert app.traject.cache is None
+
+
+def test_traject_routes():
+    traject = Traject()
+    traject.add_pattern('', 'root')
+    traject.add_pattern('b/{x}', 'bx')
+    traject.add_pattern('a/prefix{x}', 'prefix')
+    traject.add_pattern('a/{x}', 'ax')
+    traject.add_pattern('a', 'a')
+    assert list(traject.routes()) == [
+        ('', 'root'),
+        ('a', 'a'),
+        ('a/prefix{x}', 'prefix'),
+        ('a/{x}', 'ax'),
+        ('b/{x}', 'bx')]
+
+
+def test_traject_stats():
+    traject = Traject()
+    traject.add_pattern('a/prefix{x}', 'prefix', dict(x=Converter(int)))
+    traject.add_pattern('a/{x}', 'ax')
+    traject.add_pattern('a/b', 'ab')
+    traject.enable_stats()
+    assert traject.consume(['prefix1', 'a']) == ('prefix', [], {'x': 1})
+    assert traject.consume(['prefixX', 'a']) == ('ax', [],
+                                                 {'x': 'prefixX'})
+    assert traject.consume(['b', 'a']) == ('ab', [], {})
+    assert traject.consume(['c', 'b']) == (None, ['c', 'b'], {})
+    assert traject.stats.report() == {
+        'hits': {'a': 3, 'a/prefix{x}': 1, 'a/{x}': 1, 'a/b': 1},
+        'fallthroughs': {'a/prefix{x}': 1},
+        'variable_matches': 2,
+        'variable_misses': 0,
+        'average_tries': 1.5}
+    traject.enable_stats(False)
+    assert traject.stats is None
+
+
+def test_traject_stats_same_as_walk():
+    stacks = [['y', 'prefixX', 'a'], ['z', 'prefixX', 'a'],
+              ['z', 'blah', 'a'], ['blah', 'a'], [], ['+view', 'a']]
+    counting = Traject(cache_size=10)
+    walking = Traject()
+    for t in [counting, walking]:
+        t.add_pattern('a/prefix{x}/y', 'prefix')
+        t.add_pattern('a/{x}/z', 'no_prefix')
+    counting.enable_stats()
+    for stack in stacks:
+        assert counting.consume(stack) == walking.consume(stack)
+    # counting bypasses the cache
+    assert len(counting.cache) == 0
+    assert counting.stats.variable_misses == 0
+
+
+def test_traject_stats_setting():
+    config = morepath.setup()
+    app = App(testing_config=config)
+
+    @app.setting('traject', 'stats')
+    def get_stats():
+        return True
+
+    @app.path(path='foo/{id}')
+    class Foo(object):
+        def __init__(self, id):
+            self.id = id
+
+    config.commit()
+    assert app.traject.consume(['1', 'foo'])[1] == []
+    assert app.traject.stats.hits == {'foo': 1, 'foo/{id}': 1}
+
+
+def compiled_and_interpreted(patterns, cache_size=None):
+    compiled = Traject(cache_size)
+    interpreted = Traject()
+    for t in [compiled, interpreted]:
+        for args in patterns:
+            t.add_pattern(*args)
+    compiled.compile()
+    return compiled, interpreted
+
+
+def test_traject_compiled_same_as_interpreted():
+    compiled, interpreted = compiled_and_interpreted([
+        ('a/b/c', 'abc'),
+        ('a/b/d', 'abd'),
+        ('x/y', 'xy'),
+        ('a/prefix{x}/y', 'prefix'),
+        ('a/{x}/z', 'no_prefix'),
+        ('{n}', 'n', dict(n=Converter(int))),
+        ('{n}/{m}.json', 'nm', dict(n=Converter(int))),
+        ('', 'root')])
+    stacks = [
+        [], ['c', 'b', 'a'], ['d', 'c', 'b', 'a'], ['3', '2', '1', 'y', 'x'],
+        ['y', 'prefixX', 'a'], ['z', 'prefixX', 'a'], ['z', 'blah', 'a'],
+        ['+view', 'b', 'a'], ['+view'], ['1'], ['foo'], ['m.json', '1'],
+        ['2.json', '1'], ['b', '+view', 'a']]
+    for stack in stacks:
+        assert compiled.consume(stack) == interpreted.consume(stack)
+
+
+def test_traject_compiled_does_not_modify_stack():
+    compiled, interpreted = compiled_and_interpreted([('a/b', 'ab')])
+    stack = ['c', 'b', 'a']
+    assert compiled.consume(stack) == ('ab', ['c'], {})
+    assert stack == ['c', 'b', 'a']
+
+
+def test_traject_compiled_with_cache():
+    compiled, interpreted = compiled_and_interpreted(
+        [('a/{x}/b', 'axb', dict(x=Converter(int)))], cache_size=10)
+    assert compiled.consume(['b', '1', 'a']) == ('axb', [], {'x': 1})
+    assert compiled.consume(['b', '1', 'a']) == ('axb', [], {'x': 1})
+    assert compiled.cache.hits == 1
+
+
+def test_traject_add_pattern_discards_compiled():
+    traject = Traject()
+    traject.add_pattern('a', 'a')
+    traject.compile()
+    traject.add_pattern('b', 'b')
+    assert traject.consume(['b']) == ('b', [], {})
+
+
+def test_traject_compiled_on_commit():
+    config = morepath.setup()
+    app = App(testing_config=config)
+
+    @app.path(path='foo/{id}')
+    class Foo(object):
+        def __init__(self, id):
+            self.id = id
+
+    config.commit()
+    assert app.traject._compiled is not None
+    assert app.traject.consume(['foo']) == (None, [], {})
+
+
+def test_traject_consume_segments():
+    traject = Traject()
+    traject.add_pattern('a/{x}', 'ax')
+    segments = ['a', 'b', 'c']
+    assert traject.consume_segments(segments) == ('ax', 2, {'x': 'b'})
+    assert traject.consume_segments(segments, 2) == (None, 2, {})
+    assert traject.consume_segments(['x', 'a', 'b'], 1) == (
+        'ax', 3, {'x': 'b'})
+    assert traject.consume_segments(['a', '+view']) == (None, 1, {})
+    assert segments == ['a', 'b', 'c']
+
+
+def test_traject_consume_segments_cached():
+    traject = Traject(cache_size=10)
+    traject.add_pattern('a/{x}', 'ax')
+    assert traject.consume_segments(['x', 'a', 'b'], 1) == (
+        'ax', 3, {'x': 'b'})
+    assert traject.consume_segments(['y', 'z', 'a', 'b'], 2) == (
+        'ax', 4, {'x': 'b'})
+    assert traject.cache.hits == 1
+
+
 def test_traject_type_conflict():
     traject = Traject()
     traject.add_pattern('{x}', 'found_int', dict(x=Converter(int)))
@@ -378,6 +683,12 @@ def test_parse_path_multi_slash():
     assert parse_path(u'/a/b/c') == parse_path(u'/a///b/c')
 
 
+def test_parse_segments():
+    assert parse_segments(u'/a/b/c') == ['a', 'b', 'c']
+    assert parse_segments(u'/') == []
+    assert parse_segments(u'a//b/c/') == ['a', 'b', 'c']
+
+
 def test_create_path():
     assert create_path(['c', 'b', 'a']) == '/a/b/c'
 
@@ -684,6 +995,35 @@ def test_traject_no_duplicate_variables():
         traject.add_pattern('{foo}/{foo}', 'value')
 
 
+def test_path_names():
+    assert Path('{foo}/a/{bar}x{baz}').names() == ['foo', 'bar', 'baz']
+    assert Path('{foo}/a/{bar}x{baz}').positional_interpolation_str() == (
+        '%s/a/%sx%s')
+
+
+def test_inverse():
+    inverse = Inverse('a/{x}/b{y}', lambda m: m.copy(),
+                      dict(x=Converter(int), p=Converter(int)),
+                      ['p', 'q', 'r'])
+    assert inverse({'x': 1, 'y': 'Y', 'p': 2, 'q': None, 'r': []}) == (
+        'a/1/bY', {'p': ['2']})
+    assert inverse({'x': 1, 'y': 'Y', 'p': 2, 'q': 'Q', 'r': 'R'}) == (
+        'a/1/bY', {'p': ['2'], 'q': ['Q'], 'r': ['R']})
+    # parameters that are not there are omitted
+    assert inverse({'x': 1, 'y': 'Y'}) == ('a/1/bY', {})
+
+
+def test_inverse_no_variables():
+    inverse = Inverse('a/b', lambda m: m.copy(), {}, [])
+    assert inverse({}) == ('a/b', {})
+
+
+def test_inverse_extra_parameters():
+    inverse = Inverse('a', lambda m: m.copy(), dict(e=Converter(int)), [])
+    assert inverse({'extra_parameters': {'e': 1, 'f': 'F'}}) == (
+        'a', {'e': ['1'], 'f': ['F']})
+
+
 def test_interpolation_str():
     assert Path('{foo} is {bar}').interpolation_str() == '%(foo)s is %(bar)s'
 
@@ -750,3 +1090,27 @@ def test_extra_parameters():
     assert get_parameters(fake_request('?a=foo&b=bar').GET) == {
         'a': 'foo',
         'extra_parameters': {'b': 'bar'}}
+
+
+def test_parse_query():
+    assert parse_query('') == {}
+    assert parse_query('a=A&b=B&a=C') == {'a': ['A', 'C'], 'b': ['B']}
+    assert parse_query('a=1+2%2B3;b&&c=') == {
+        'a': ['1 2+3'], 'b': [''], 'c': ['']}
+    assert parse_query('%C3%A9=%C3%A9') == {u'\xe9': [u'\xe9']}
+
+
+def test_parse_query_same_as_webob():
+    for query in ['a=A&b=B&a=C', 'a=1+2%2B3;b&&c=', 'x=%2F&=y&z==']:
+        request = fake_request('?' + query)
+        assert parse_query(query) == request.GET.dict_of_lists()
+
+
+def test_parameter_factory_query_parameters():
+    get_parameters = ParameterFactory({'a': 0}, {'a': Converter(int)}, [],
+                                      True)
+    request = fake_request('?a=1&b=B')
+    assert request.query_parameters == {'a': ['1'], 'b': ['B']}
+    assert get_parameters(request.query_parameters) == {
+        'a': 1,
+        'extra_parameters': {'b': 'B'}}
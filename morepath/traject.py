@@ -1,13 +1,17 @@
 import re
 from functools import total_ordering
+from itertools import islice
 from .converter import IDENTITY_CONVERTER
 from .error import TrajectError
+from .cache import LRUCache
 
 IDENTIFIER = re.compile(r'^[^\d\W]\w*$')
 PATH_VARIABLE = re.compile(r'\{([^}]*)\}')
 VARIABLE = '{}'
 PATH_SEPARATOR = re.compile(r'/+')
 VIEW_PREFIX = '+'
+# the maximum amount of groups Python allows in a regular expression
+MAX_GROUPS = 99
 
 
 @total_ordering
@@ -54,11 +58,18 @@ class Step(object):
         return bool(self.names)
 
     def match(self, s):
-        result = {}
         matched = self._variables_re.match(s)
         if matched is None:
-            return False, result
-        for name, value in zip(self.names, matched.groups()):
+            return False, {}
+        return self.convert(matched.groups())
+
+    def convert(self, values):
+        """Convert matched variable strings using the converters.
+
+        Returns a ``(matched, variables)`` tuple like :meth:`match`.
+        """
+        result = {}
+        for name, value in zip(self.names, values):
             converter = self.get_converter(name)
             try:
                 result[name] = converter.decode([value])
@@ -93,6 +104,7 @@ class Node(object):
     def __init__(self):
         self._name_nodes = {}
         self._variable_nodes = []
+        self._variable_matcher = None
         self.value = None
 
     def add(self, step):
@@ -109,6 +121,7 @@ class Node(object):
         return node
 
     def add_variable_node(self, step):
+        self._variable_matcher = None
         for i, node in enumerate(self._variable_nodes):
             if node.step == step:
                 return node
@@ -125,6 +138,24 @@ class Node(object):
         return result
 
     def get(self, segment):
+        node = self._name_nodes.get(segment)
+        if node is not None:
+            return node, {}
+        if not self._variable_nodes:
+            return None, {}
+        matcher = self._variable_matcher
+        if matcher is None:
+            nodes = self._variable_nodes
+            matcher = self._variable_matcher = VariableMatcher(
+                [n.step for n in nodes], nodes)
+        return matcher(segment)
+
+    def linear_get(self, segment):
+        """Get node for segment by trying each variable node in turn.
+
+        This is the reference implementation of :meth:`get`, which
+        matches all variable nodes using a single combined regex instead.
+        """
         node = self._name_nodes.get(segment)
         if node is not None:
             return node, {}
@@ -134,6 +165,43 @@ class Node(object):
                 return node, variables
         return None, {}
 
+    def routes(self, pattern=''):
+        """Iterate over the patterns below this node that have a value.
+
+        Name nodes come first, sorted by name, followed by the variable
+        nodes in order of precedence.
+
+        :param pattern: the pattern that leads up to this node.
+        :returns: iterable of ``(pattern, value)`` tuples.
+        """
+        if self.value is not None:
+            yield pattern, self.value
+        nodes = [node for segment, node in sorted(self._name_nodes.items())]
+        nodes.extend(self._variable_nodes)
+        for node in nodes:
+            for route in node.routes(join_pattern(pattern, node.step.s)):
+                yield route
+
+    def compile(self, step=None):
+        """Compile node and its descendants into nested tuples.
+
+        Each compiled node is a ``(value, names, match_variable, step)``
+        tuple. ``names`` maps segments to compiled nodes and
+        ``match_variable`` is a :class:`VariableMatcher` that
+        returns compiled nodes, or ``None`` if there are no variable
+        nodes.
+        """
+        names = {segment: node.compile(node.step) for
+                 segment, node in self._name_nodes.items()}
+        nodes = self._variable_nodes
+        if nodes:
+            match_variable = VariableMatcher(
+                [node.step for node in nodes],
+                [node.compile(node.step) for node in nodes])
+        else:
+            match_variable = None
+        return self.value, names, match_variable, step
+
 
 class StepNode(Node):
     def __init__(self, step):
@@ -144,6 +212,107 @@ class StepNode(Node):
         return self.step.match(segment)
 
 
+class VariableMatcher(object):
+    """Match a segment against a list of variable steps in one go.
+
+    The regular expressions of the steps are combined into a single
+    alternation, in order of precedence. Each alternative is a named
+    group so that we can tell which step matched from ``lastgroup``.
+
+    Python limits the amount of groups in a regular expression, so
+    for very large amounts of steps we create more than one combined
+    expression.
+    """
+    def __init__(self, steps, targets):
+        """
+        :param steps: list of :class:`Step` in order of precedence.
+        :param targets: list of the same length as ``steps``. The
+          target for the step that matched is returned.
+        """
+        self.steps = steps
+        self.targets = targets
+        self.expressions = []
+        self.groups = {}
+        alternatives = []
+        group_count = 0
+        for i, step in enumerate(steps):
+            step_re = step._variables_re
+            # one group for the alternative plus those for the variables
+            if group_count + step_re.groups + 1 > MAX_GROUPS:
+                self.expressions.append(combine_res(alternatives))
+                alternatives = []
+                group_count = 0
+            name = 'n%s' % i
+            alternatives.append('(?P<%s>%s)$' % (
+                name, step_re.pattern[1:-1]))
+            self.groups[name] = (i, group_count + 2,
+                                 group_count + 2 + step_re.groups)
+            group_count += step_re.groups + 1
+        self.expressions.append(combine_res(alternatives))
+
+    def __call__(self, segment):
+        for expression in self.expressions:
+            matched = expression.match(segment)
+            if matched is None:
+                continue
+            i, start, end = self.groups[matched.lastgroup]
+            values = [matched.group(g) for g in range(start, end)]
+            converted, variables = self.steps[i].convert(values)
+            if converted:
+                return self.targets[i], variables
+            # conversion failed, fall back on the steps after this one
+            for j in range(i + 1, len(self.steps)):
+                converted, variables = self.steps[j].match(segment)
+                if converted:
+                    return self.targets[j], variables
+            return None, {}
+        return None, {}
+
+
+class MatchStats(object):
+    """Statistics on how a :class:`Traject` matches paths.
+
+    Collected when counting is enabled with
+    :meth:`Traject.enable_stats`. Use it to find hot patterns and
+    patterns that are expensive to match.
+    """
+    def __init__(self):
+        self.hits = {}
+        """Amount of times each pattern was traversed."""
+        self.fallthroughs = {}
+        """Amount of times a segment matched a pattern but the
+        converter could not decode it, so that later patterns were
+        tried instead."""
+        self.variable_matches = 0
+        """Amount of segments that matched a variable node."""
+        self.variable_misses = 0
+        """Amount of segments that matched no variable node."""
+        self.variable_tries = 0
+        """Amount of variable nodes tried for segments that matched."""
+
+    def average_tries(self):
+        """Average amount of variable nodes tried before a match.
+        """
+        if not self.variable_matches:
+            return 0.0
+        return float(self.variable_tries) / self.variable_matches
+
+    def report(self):
+        """Get the statistics.
+
+        :returns: a dictionary with ``hits``, ``fallthroughs``,
+          ``variable_matches``, ``variable_misses`` and
+          ``average_tries`` keys.
+        """
+        return {
+            'hits': dict(self.hits),
+            'fallthroughs': dict(self.fallthroughs),
+            'variable_matches': self.variable_matches,
+            'variable_misses': self.variable_misses,
+            'average_tries': self.average_tries(),
+        }
+
+
 class Path(object):
     def __init__(self, path):
         self.path = path
@@ -156,54 +325,131 @@ class Path(object):
     def interpolation_str(self):
         return '/'.join([step.named_interpolation_str for step in self.steps])
 
-    def variables(self):
+    def positional_interpolation_str(self):
+        """Interpolation string that takes variables in order of names.
+        """
+        return '/'.join([interpolation_str(step.s) for step in self.steps])
+
+    def names(self):
+        """Variable names in the order they appear in the path.
+        """
         result = []
         for step in self.steps:
             result.extend(step.names)
-        return set(result)
+        return result
+
+    def variables(self):
+        return set(self.names())
 
 
 class Inverse(object):
     def __init__(self, path, get_variables, converters,
                  parameter_names):
         self.path = path
-        self.interpolation_path = Path(path).interpolation_str()
+        p = Path(path)
+        self.interpolation_path = p.interpolation_str()
         self.get_variables = get_variables
         self.converters = converters
         self.parameter_names = set(parameter_names)
+        # precompute what we can so that generating a link is cheap
+        self.path_encoders = [
+            (name, converters.get(name, IDENTITY_CONVERTER).encode)
+            for name in p.names()]
+        self.parameter_encoders = [
+            (name, converters.get(name, IDENTITY_CONVERTER).encode)
+            for name in self.parameter_names]
+        if self.path_encoders:
+            self.format = p.positional_interpolation_str().__mod__
+        else:
+            self.format = None
 
     def __call__(self, model):
-        converters = self.converters
-        parameter_names = self.parameter_names
         all_variables = self.get_variables(model)
-        extra_parameters = all_variables.pop('extra_parameters', None)
         assert isinstance(all_variables, dict)
-        variables = {
-            name: converters.get(name, IDENTITY_CONVERTER).encode(value)[0] for
-            name, value in all_variables.items()
-            if name not in parameter_names}
+        extra_parameters = all_variables.pop('extra_parameters', None)
+        if self.format is None:
+            path = self.interpolation_path
+        else:
+            path = self.format(tuple([
+                encode(all_variables[name])[0] for
+                name, encode in self.path_encoders]))
 
         # all remaining variables need to show up in the path
         # XXX not sure about value != []
-        parameters = {
-            name: converters.get(name, IDENTITY_CONVERTER).encode(value) for
-            name, value in all_variables.items()
-            if (name in parameter_names and
-                value is not None and value != [])
-            }
+        parameters = {}
+        for name, encode in self.parameter_encoders:
+            value = all_variables.get(name)
+            if value is None or value == []:
+                continue
+            parameters[name] = encode(value)
         if extra_parameters:
+            converters = self.converters
             for name, value in extra_parameters.items():
                 parameters[name] = converters.get(
                     name, IDENTITY_CONVERTER).encode(value)
-        return self.interpolation_path % variables, parameters
+        return path, parameters
 
 
 class Traject(object):
-    def __init__(self):
+    def __init__(self, cache_size=None):
         super(Traject, self).__init__()
         self._root = Node()
+        self._compiled = None
+        self.cache = None
+        self.stats = None
+        self.enable_cache(cache_size)
+
+    def enable_cache(self, size):
+        """Cache the results of :meth:`consume`.
+
+        The cache is keyed on the stack and stores the value found, the
+        remaining stack and the unconverted variables, so that
+        conversion still happens each time.
+
+        :param size: the maximum amount of entries in the cache.
+          If ``None`` or ``0`` caching is disabled.
+        """
+        if not size:
+            self.cache = None
+        else:
+            self.cache = LRUCache(size)
+
+    def enable_stats(self, enabled=True):
+        """Count how paths are matched.
+
+        While enabled, :meth:`consume` walks the nodes one by one and
+        records the results in :attr:`stats`, a :class:`MatchStats`
+        instance. This is slower and bypasses the cache, so only enable
+        it to analyze the patterns.
+
+        :param enabled: if ``False``, counting is disabled and
+          :attr:`stats` is ``None``.
+        """
+        if enabled:
+            self.stats = MatchStats()
+        else:
+            self.stats = None
+
+    def routes(self):
+        """Iterate over all patterns that have a value.
+
+        :returns: iterable of ``(pattern, value)`` tuples.
+        """
+        return self._root.routes()
+
+    def compile(self):
+        """Compile the patterns added so far for faster consumption.
+
+        Afterward :meth:`consume` walks a structure of nested tuples
+        and dictionaries instead of node objects. The result is the
+        same. Adding a pattern discards the compiled structure again.
+        """
+        self._compiled = self._root.compile()
 
     def add_pattern(self, path, value, converters=None):
+        self._compiled = None
+        if self.cache is not None:
+            self.cache.clear()
         node = self._root
         known_variables = set()
         for segment in reversed(parse_path(path)):
@@ -216,32 +462,173 @@ class Traject(object):
         node.value = value
 
     def consume(self, stack):
-        stack = stack[:]
+        """Consume a stack of segments.
+
+        :param stack: the stack of segments, last segment first.
+        :returns: a ``(value, stack, variables)`` tuple with the value
+          found, the stack that remains unconsumed and the variables
+          that matched.
+        """
+        segments = stack[::-1]
+        value, pos, variables = self.consume_segments(segments)
+        stack = segments[pos:]
+        stack.reverse()
+        return value, stack, variables
+
+    def consume_segments(self, segments, pos=0):
+        """Consume segments starting at a position.
+
+        The segments are not modified or copied.
+
+        :param segments: list of segments in path order.
+        :param pos: the index of the first segment to consume.
+        :returns: a ``(value, pos, variables)`` tuple with the value
+          found, the index of the first unconsumed segment and the
+          variables that matched.
+        """
+        if self.stats is not None:
+            return self.counting_walk(segments, pos)
+        cache = self.cache
+        if cache is None:
+            return self.walk(segments, pos)
+        key = tuple(islice(segments, pos, None))
+        cached = cache.get(key)
+        if cached is not None:
+            value, amount, matched = cached
+            variables = {}
+            # only convert the variable strings, no need to match again
+            for step, values in matched:
+                converted, new_variables = step.convert(values)
+                if not converted:
+                    break
+                variables.update(new_variables)
+            else:
+                return value, pos + amount, variables
+        matched = []
+        value, end, variables = self.walk(segments, pos, matched)
+        matched = tuple([(step, step._variables_re.match(segment).groups())
+                         for step, segment in matched])
+        cache.put(key, (value, end - pos, matched))
+        return value, end, variables
+
+    def walk(self, segments, pos, matched=None):
+        """Walk the tree of nodes to consume segments.
+
+        :param segments: list of segments in path order.
+        :param pos: the index of the first segment to consume.
+        :param matched: optional list. If given, ``(step, segment)``
+          tuples are appended to it for each step with variables that
+          matched.
+        :returns: a ``(value, pos, variables)`` tuple.
+        """
+        if self._compiled is not None:
+            return self.compiled_walk(segments, pos, matched)
         node = self._root
         variables = {}
-        while stack:
-            segment = stack.pop()
+        end = len(segments)
+        while pos < end:
+            segment = segments[pos]
             if segment.startswith(VIEW_PREFIX):
-                stack.append(segment)
-                return node.value, stack, variables
+                break
             new_node, new_variables = node.get(segment)
             if new_node is None:
-                stack.append(segment)
-                return node.value, stack, variables
+                break
             node = new_node
+            if new_variables and matched is not None:
+                matched.append((node.step, segment))
             variables.update(new_variables)
-        return node.value, stack, variables
+            pos += 1
+        return node.value, pos, variables
 
+    def compiled_walk(self, segments, pos, matched=None):
+        """Walk the compiled patterns to consume segments.
 
-def parse_path(path):
-    """Parse a path /foo/bar/baz to a stack of steps.
+        Like :meth:`walk`, but without node method calls. Requires
+        :meth:`compile`.
+        """
+        value, names, match_variable, step = self._compiled
+        variables = {}
+        end = len(segments)
+        while pos < end:
+            segment = segments[pos]
+            if segment.startswith(VIEW_PREFIX):
+                break
+            compiled = names.get(segment)
+            if compiled is None:
+                if match_variable is None:
+                    break
+                compiled, new_variables = match_variable(segment)
+                if compiled is None:
+                    break
+                if matched is not None:
+                    matched.append((compiled[3], segment))
+                variables.update(new_variables)
+            value, names, match_variable, step = compiled
+            pos += 1
+        return value, pos, variables
+
+    def counting_walk(self, segments, pos):
+        """Walk the tree of nodes and record statistics.
+
+        Like :meth:`walk`, but tries variable nodes one by one so that
+        we can count them. Requires :meth:`enable_stats`.
+        """
+        stats = self.stats
+        hits = stats.hits
+        node = self._root
+        pattern = ''
+        variables = {}
+        end = len(segments)
+        while pos < end:
+            segment = segments[pos]
+            if segment.startswith(VIEW_PREFIX):
+                break
+            new_node = node._name_nodes.get(segment)
+            new_variables = {}
+            if new_node is None and node._variable_nodes:
+                for i, candidate in enumerate(node._variable_nodes):
+                    step = candidate.step
+                    found = step._variables_re.match(segment)
+                    if found is None:
+                        continue
+                    converted, new_variables = step.convert(found.groups())
+                    if converted:
+                        new_node = candidate
+                        stats.variable_matches += 1
+                        stats.variable_tries += i + 1
+                        break
+                    fallthrough = join_pattern(pattern, step.s)
+                    stats.fallthroughs[fallthrough] = (
+                        stats.fallthroughs.get(fallthrough, 0) + 1)
+                else:
+                    stats.variable_misses += 1
+            if new_node is None:
+                break
+            node = new_node
+            pattern = join_pattern(pattern, node.step.s)
+            hits[pattern] = hits.get(pattern, 0) + 1
+            variables.update(new_variables)
+            pos += 1
+        return node.value, pos, variables
 
-    A step is a string, such as 'foo', 'bar' and 'baz'.
+
+def parse_segments(path):
+    """Parse a path /foo/bar/baz to a list of segments in path order.
+
+    A segment is a string, such as 'foo', 'bar' and 'baz'.
     """
     path = path.strip('/')
     if not path:
         return []
-    result = PATH_SEPARATOR.split(path)
+    return PATH_SEPARATOR.split(path)
+
+
+def parse_path(path):
+    """Parse a path /foo/bar/baz to a stack of steps.
+
+    A step is a string, such as 'foo', 'bar' and 'baz'.
+    """
+    result = parse_segments(path)
     result.reverse()
     return result
 
@@ -252,6 +639,14 @@ def create_path(stack):
     return '/' + u'/'.join(reversed(stack))
 
 
+def join_pattern(pattern, s):
+    """Add step to pattern.
+    """
+    if not pattern:
+        return s
+    return pattern + '/' + s
+
+
 def is_identifier(s):
     return IDENTIFIER.match(s) is not None
 
@@ -269,6 +664,10 @@ def create_variables_re(s):
     return re.compile('^' + PATH_VARIABLE.sub(r'(.+)', s) + '$')
 
 
+def combine_res(patterns):
+    return re.compile('^(?:' + '|'.join(patterns) + ')')
+
+
 def generalize_variables(s):
     return PATH_VARIABLE.sub('{}', s)
 
@@ -1,15 +1,27 @@
 from morepath import generic
 from .request import Request, Response
-from reg import PredicateMatcher, Predicate, ANY
+from reg import PredicateMatcher, Predicate, KeyIndex, ANY
+from reg.predicate import PredicateRegistryError
+from itertools import chain
 import json
 from webob.exc import HTTPFound
+from webob.datetime_utils import serialize_date, parse_date
+
+
+# streamed JSON is sent in chunks of about this many bytes
+JSON_CHUNK_SIZE = 64 * 1024
 
 
 class View(object):
-    def __init__(self, func, render, permission):
+    def __init__(self, func, render, permission, etag=None,
+                 last_modified=None, cache=None):
         self.func = func
         self.render = render
         self.permission = permission
+        self.etag = etag
+        self.last_modified = last_modified
+        self.conditional = etag is not None or last_modified is not None
+        self.cache = cache
 
     def __call__(self, request, model):
         # the argument order is reversed here for the actual view function
@@ -21,14 +33,21 @@ class View(object):
 # XXX what happens if predicates is None for one registration
 # but filled for another?
 def register_view(registry, model, view, render=None, permission=None,
-                  predicates=None):
+                  predicates=None, etag=None, last_modified=None,
+                  cache=None):
     if permission is not None:
         # instantiate permission class so it can be looked up using reg
         permission = permission()
-    registration = View(view, render, permission)
+    if render is render_json or render is render_json_stream:
+        render = JsonRender(registry, render)
+    registration = View(view, render, permission, etag, last_modified,
+                        cache)
     if predicates is not None:
         registration = get_predicate_registration(registry, model,
                                                   predicates, registration)
+    else:
+        # without predicates the view matches any name
+        register_view_name(registry, model, ANY)
     registry.register(generic.view, (Request, model), registration)
 
 
@@ -39,9 +58,11 @@ def get_predicate_registration(registry, model, predicates, registration):
     if matcher is None:
         predicate_infos = predicate_info.values()
         predicate_infos.sort()
-        matcher = PredicateMatcher(
+        matcher = ViewMatcher(
             [predicate for (order, predicate) in predicate_infos])
+        register_view_matcher(registry, matcher)
     matcher.register(predicates, registration)
+    register_view_name(registry, model, predicates.get('name', ANY))
     for order, predicate in predicate_info.values():
         fallback = getattr(predicate, 'fallback', None)
         if fallback is None:
@@ -51,9 +72,175 @@ def get_predicate_registration(registry, model, predicates, registration):
         p = predicates.copy()
         p[predicate.name] = ANY
         matcher.register(p, View(fallback, None, None))
+        register_view_name(registry, model, p.get('name', ANY))
     return matcher
 
 
+AMBIGUOUS = object()
+
+
+class ViewMatcher(PredicateMatcher):
+    """Match views by predicates using a decision tree.
+
+    The registered views are compiled into nested dictionaries, one
+    level for each predicate in predicate order, which map predicate
+    values (or ``ANY``) to the next level. Matching a view then takes
+    a few dictionary lookups, and prefers specific values over ``ANY``
+    in predicate order, like :class:`reg.PredicateMatcher`.
+
+    Predicates with an index other than ``reg.KeyIndex`` cannot be
+    compiled; in that case the ``reg.PredicateMatcher`` implementation
+    is used.
+    """
+    def __init__(self, predicates):
+        super(ViewMatcher, self).__init__(predicates)
+        self.registrations = []
+        self.compilable = all(predicate.index_factory is KeyIndex
+                              for predicate in predicates)
+        self.skip = ()
+        self.tree = None
+
+    def register(self, predicates, value):
+        super(ViewMatcher, self).register(predicates, value)
+        self.registrations.append((predicates, value))
+        # a view registered after commit can use a skipped predicate
+        self.skip = [name for name in self.skip
+                     if predicates.get(name, ANY) is ANY]
+        self.tree = None
+
+    def keys(self):
+        """Get the keys registered for each predicate.
+
+        :returns: a dictionary of predicate names -> sets of keys.
+        """
+        result = {}
+        for predicate in self._predicates:
+            result[predicate.name] = set(
+                [predicates.get(predicate.name, ANY) for
+                 predicates, value in self.registrations])
+        return result
+
+    def compile(self, skip=()):
+        """Compile the registered views into a decision tree.
+
+        :param skip: names of predicates that are not calculated, as
+          all views match any value for them. They are skipped again
+          when the matcher recompiles after a later registration.
+        """
+        self.skip = skip
+        self.calculated = [predicate for predicate in self._predicates
+                           if predicate.name not in skip]
+        self.names = [(predicate.name, predicate.default)
+                      for predicate in self.calculated]
+        tree = {}
+        last = len(self.calculated) - 1
+        for predicates, value in self.registrations:
+            node = tree
+            for i, predicate in enumerate(self.calculated):
+                key = predicates.get(predicate.name, ANY)
+                if i == last:
+                    if key in node:
+                        value = AMBIGUOUS
+                    node[key] = value
+                else:
+                    node = node.setdefault(key, {})
+        if last == -1:
+            # no predicates to calculate, so any view matches
+            values = [registered for predicates, registered in
+                      self.registrations]
+            if len(values) > 1:
+                tree = AMBIGUOUS
+            elif values:
+                tree = values[0]
+            else:
+                tree = None
+        self.tree = tree
+
+    def predicates(self, *args):
+        if not self.compilable:
+            return super(ViewMatcher, self).predicates(*args)
+        if self.tree is None:
+            self.compile(self.skip)
+        return {predicate.name: predicate.calc(*args) for
+                predicate in self.calculated}
+
+    def __call__(self, *args, **kw):
+        if not self.compilable:
+            return super(ViewMatcher, self).__call__(*args, **kw)
+        if self.tree is None:
+            self.compile(self.skip)
+        result = match_tree(self.tree, [kw.get(name, default) for
+                                        name, default in self.names])
+        if result is AMBIGUOUS:
+            raise PredicateRegistryError("Multiple matches for: %r" % kw)
+        return result
+
+
+def match_tree(tree, values, i=0):
+    """Find value in decision tree, preferring specific keys over ANY.
+    """
+    if i == len(values):
+        return tree
+    node = tree.get(values[i])
+    if node is not None:
+        result = match_tree(node, values, i + 1)
+        if result is not None:
+            return result
+    node = tree.get(ANY)
+    if node is not None:
+        return match_tree(node, values, i + 1)
+    return None
+
+
+def register_view_matcher(registry, matcher):
+    view_matchers = registry.exact('view_matchers', ())
+    if view_matchers is None:
+        view_matchers = []
+        registry.register('view_matchers', (), view_matchers)
+    view_matchers.append(matcher)
+
+
+def compile_view_matchers(registry):
+    """Compile the view matchers of an app into decision trees.
+
+    Predicates for which all views in the app match any value are not
+    calculated at all. This has to be decided for the app as a whole,
+    as the predicates calculated for a model are also used to match
+    views registered for its base classes.
+    """
+    view_matchers = registry.exact('view_matchers', ()) or []
+    keys = {}
+    for matcher in view_matchers:
+        for name, matcher_keys in matcher.keys().items():
+            keys.setdefault(name, set()).update(matcher_keys)
+    skip = set([name for name, name_keys in keys.items()
+                if name_keys == set([ANY])])
+    for matcher in view_matchers:
+        if matcher.compilable:
+            matcher.compile(skip)
+
+
+def register_view_name(registry, model, name):
+    view_names = registry.exact('view_names', (model,))
+    if view_names is None:
+        view_names = set()
+        registry.register('view_names', (model,), view_names)
+    view_names.add(name)
+
+
+def has_view_name(lookup, model, name):
+    """Check whether a view may be found for model with this name.
+
+    If this returns ``False`` no view is registered for the model
+    (or its base classes) with this name, so there is no need to
+    match predicates to know that the view cannot be found.
+    """
+    for view_names in lookup.all('view_names', [model]):
+        if name in view_names or ANY in view_names:
+            return True
+    return False
+
+
 def get_predicates_with_defaults(predicates, predicate_info):
     result = {}
     for order, predicate in predicate_info.values():
@@ -72,8 +259,10 @@ def register_predicate(registry, name, order, default, index, calc):
     if predicate_info is None:
         predicate_info = {}
         registry.register('predicate_info', (), predicate_info)
-    predicate_info[name] = order, Predicate(name, index,
-                                            self_request_calc, default)
+    predicate = Predicate(name, index, self_request_calc, default)
+    # remember the original function so we can recognize the predicate
+    predicate.func = calc
+    predicate_info[name] = order, predicate
 
 
 def register_predicate_fallback(registry, name, obj):
@@ -85,10 +274,146 @@ def register_predicate_fallback(registry, name, obj):
     predicate.fallback = obj
 
 
-def render_json(content):
+class JsonRender(object):
+    """Render JSON with the encoder configured for an app.
+
+    :func:`render_json` and :func:`render_json_stream` are wrapped in
+    this when they are registered for a view, so that they use the
+    encoder and separators of the ``json`` settings.
+    """
+    def __init__(self, app, render):
+        self.app = app
+        self.render = render
+
+    def __call__(self, content):
+        app = self.app
+        if self.render is render_json_stream:
+            return render_json_stream(content, app.json_encode,
+                                      app.json_item_separator)
+        return self.render(content, app.json_encode)
+
+
+def get_validators(request, model, view):
+    """Get the ETag and modification date of the model for a view.
+
+    :returns: a ``(etag, last_modified)`` tuple. Either is ``None`` if
+      the view doesn't define it.
+    """
+    etag = last_modified = None
+    if view.etag is not None:
+        etag = view.etag(model, request)
+    if view.last_modified is not None:
+        last_modified = view.last_modified(model, request)
+        if last_modified is not None:
+            # HTTP dates have a resolution of seconds
+            last_modified = parse_date(serialize_date(last_modified))
+    return etag, last_modified
+
+
+def is_not_modified(request, etag, last_modified):
+    """Check whether the client already has this version of the response.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``.
+    Only ``GET`` and ``HEAD`` requests can be not modified.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    environ = request.environ
+    if 'HTTP_IF_NONE_MATCH' in environ:
+        return etag is not None and etag in request.if_none_match
+    if last_modified is not None and 'HTTP_IF_MODIFIED_SINCE' in environ:
+        if_modified_since = request.if_modified_since
+        return (if_modified_since is not None and
+                last_modified <= if_modified_since)
+    return False
+
+
+def set_validators(response, etag, last_modified):
+    """Set ETag and Last-Modified headers unless they are already set.
+    """
+    if etag is not None and response.etag is None:
+        response.etag = etag
+    if last_modified is not None and response.last_modified is None:
+        response.last_modified = last_modified
+
+
+def render_json(content, encode=None):
     """Take dict/list/string/number content and return json response.
+
+    :param encode: function that encodes content to a JSON string.
+      By default :func:`json.dumps` is used. For views this is the
+      encoder configured with the ``json`` settings.
+    """
+    if encode is None:
+        encode = json.dumps
+    return Response(utf8(encode(content)), content_type='application/json')
+
+
+def utf8(s):
+    """Encode JSON text to bytes.
+
+    An encoder returns text instead of bytes if ``ensure_ascii`` is
+    off and there is non-ASCII content.
+    """
+    if isinstance(s, unicode):
+        return s.encode('utf-8')
+    return s
+
+
+def render_json_stream(content, encode=None, separator=', '):
+    """Take iterable content and return streaming json response.
+
+    Lists, tuples, generators and other iterables are encoded as a
+    JSON array one item at a time, and sent in chunks of about
+    :data:`JSON_CHUNK_SIZE` bytes, so that the whole body doesn't need
+    to be in memory at once. If the array fits in a single chunk the
+    response gets a ``Content-Length`` like with
+    :func:`morepath.render_json`, otherwise it has none.
+
+    Other content, such as a dict, is rendered by
+    :func:`morepath.render_json`.
+
+    :param encode: function that encodes content to a JSON string, as
+      for :func:`morepath.render_json`.
+    :param separator: the separator between items of the array. For
+      views this is the item separator of the ``json.separators``
+      setting.
+    """
+    if encode is None:
+        encode = json.dumps
+    if (isinstance(content, (dict, basestring)) or
+            not hasattr(content, '__iter__')):
+        return render_json(content, encode)
+    chunks = iter_json_chunks(content, encode, JSON_CHUNK_SIZE, separator)
+    first = next(chunks)
+    second = next(chunks, None)
+    if second is None:
+        return Response(first, content_type='application/json')
+    return Response(app_iter=chain([first, second], chunks),
+                    content_type='application/json')
+
+
+def iter_json_chunks(items, encode, chunk_size, separator=', '):
+    """Encode items as JSON array in chunks of at least chunk_size bytes.
+
+    Only the last chunk can be smaller. A chunk can be bigger when a
+    single item is encoded to more than chunk_size bytes.
     """
-    return Response(json.dumps(content), content_type='application/json')
+    buffer = ['[']
+    size = 1
+    prefix = ''
+    for item in items:
+        s = utf8(encode(item))
+        buffer.append(prefix)
+        buffer.append(s)
+        size += len(prefix) + len(s)
+        prefix = separator
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    buffer.append(']')
+    yield ''.join(buffer)
 
 
 def render_html(content):
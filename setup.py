@@ -37,4 +37,9 @@ setup(name='morepath',
               'pytest-cov',
               'WebTest >= 2.0.14'],
         ),
+      entry_points={
+        'console_scripts': [
+            'morepath-routes = morepath.routes:main',
+            ],
+        },
       )